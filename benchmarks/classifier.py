@@ -0,0 +1,77 @@
+import argparse
+import os
+import tempfile
+import time
+
+import parse_v3
+from benchmarks import synthetic_log
+
+# the elif chain parse_v3 used before the single regex dispatch
+CHAINED_MARKERS = list(parse_v3.LINE_HANDLERS)
+
+def chained_classify(line: str, markers=CHAINED_MARKERS):
+    for marker in markers:
+        if marker in line:
+            return marker
+    return None
+
+def multi_marker_lines(markers):
+    # every pair of markers on one line in both orders, the synthetic log
+    # only has lines with a single marker
+    return ['[{}] gc_id=1 {} took 12ms\n'.format(first, second)
+            for first in markers for second in markers if first != second]
+
+def check_multi_marker_lines():
+    # the str and the bytes dispatch against the chain, for both marker tables
+    tables = [
+        (list(parse_v3.LINE_HANDLERS), parse_v3.LINE_REGEX, parse_v3.LINE_EARLIER,
+         parse_v3.BYTES_LINE_REGEX, parse_v3.BYTES_LINE_EARLIER),
+        (list(parse_v3.SUMMARY_LINE_HANDLERS), parse_v3.SUMMARY_LINE_REGEX, parse_v3.SUMMARY_LINE_EARLIER,
+         parse_v3.SummaryEventParser.bytes_line_regex, parse_v3.SummaryEventParser.bytes_line_earlier),
+    ]
+    checked = 0
+    for markers, regex, earlier, bytes_regex, bytes_earlier in tables:
+        for line in multi_marker_lines(markers):
+            expected = chained_classify(line, markers)
+            assert parse_v3.first_marker(regex.search(line), earlier, line) == expected, line
+            raw = line.encode()
+            assert parse_v3.first_marker(bytes_regex.search(raw), bytes_earlier, raw).decode() == expected, line
+            checked += 1
+    return checked
+
+def lines_per_second(classify, lines, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for line in lines:
+            classify(line)
+        best = min(best, time.perf_counter() - start_time)
+    return len(lines) / best
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log = os.path.join(tmp_dir, 'ucare.log')
+        synthetic_log.generate(log, args.events, args.noise)
+        with open(log) as log_file:
+            lines = log_file.readlines()
+
+        for line in lines:
+            assert chained_classify(line) == parse_v3.classify_line(line), line
+        print('{} lines with several markers classified like the chain'.format(check_multi_marker_lines()))
+
+        print('{} lines, noise ratio {}'.format(len(lines), args.noise))
+        before = lines_per_second(chained_classify, lines, args.repeat)
+        after = lines_per_second(parse_v3.classify_line, lines, args.repeat)
+        print('chained `in` checks : {:12.0f} lines/sec'.format(before))
+        print('single regex search : {:12.0f} lines/sec ({:.2f}x)'.format(after, after / before))
+
+        start_time = time.perf_counter()
+        parse_v3.parse(log, os.path.join(tmp_dir, 'ucare.csv'))
+        print('parse_v3.parse      : {:12.0f} lines/sec'.format(len(lines) / (time.perf_counter() - start_time)))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-e', '--events', type=int, default=20000, help='Number of GC events')
+    parser.add_argument('-n', '--noise', type=float, default=0.8, help='Share of noise lines')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Best of N runs')
+    main(parser.parse_args())
@@ -0,0 +1,57 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+import parse_v3
+import utilities
+from benchmarks import synthetic_log
+
+# how utilities.clean_data worked before clean_mask
+def drop_duplicates_clean_data(dataframe: pd.DataFrame, n_round: int = 2):
+    df = dataframe.copy(deep=True)
+    df = df.round(n_round)
+    df = df.drop_duplicates()
+    return df
+
+def measure(clean_data, dataset: pd.DataFrame, repeat: int):
+    # best time of `repeat` runs, and the peak of what the run allocated on top of `dataset`
+    best = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        clean_data(dataset)
+        best = min(best, time.perf_counter() - start_time)
+    tracemalloc.start()
+    cleaned = clean_data(dataset)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 1024 ** 2, cleaned
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log = os.path.join(tmp_dir, 'ucare.log')
+        synthetic_log.generate(log, args.events, 0.0)
+        csv_file = os.path.join(tmp_dir, 'ucare.csv')
+        parse_v3.parse(log, csv_file)
+        events = pd.read_csv(csv_file)
+    # the same logs concatenated over and over, as a training set of many runs
+    dataset = pd.concat([events] * -(-args.rows // len(events)), ignore_index=True).iloc[:args.rows]
+    print('{} rows, {} columns, {:.1f} MiB'.format(len(dataset), dataset.shape[1], dataset.memory_usage(deep=True).sum() / 1024 ** 2))
+
+    before, before_peak, expected = measure(drop_duplicates_clean_data, dataset, args.repeat)
+    after, after_peak, cleaned = measure(utilities.clean_data, dataset, args.repeat)
+    pd.testing.assert_frame_equal(expected, cleaned)
+
+    print('copy, round, drop_duplicates : {:7.3f}s  peak {:8.1f} MiB'.format(before, before_peak))
+    print('64-bit row hash, clean_mask  : {:7.3f}s  peak {:8.1f} MiB ({:.2f}x time, {:.2f}x memory)'.format(
+        after, after_peak, before / after, before_peak / after_peak))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-e', '--events', type=int, default=20000, help='Number of distinct GC events')
+    parser.add_argument('-n', '--rows', type=int, default=1000000, help='Number of rows to clean')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Best of N runs')
+    main(parser.parse_args())
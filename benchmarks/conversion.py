@@ -0,0 +1,38 @@
+import argparse
+import os
+import tempfile
+import time
+
+import parse_v3
+from benchmarks import synthetic_log
+
+def rows_per_second(parse, log: str, output: str, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        parse(log, output)
+        best = min(best, time.perf_counter() - start_time)
+    with open(output) as csv_file:
+        return (sum(1 for _ in csv_file) - 1) / best
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log = os.path.join(tmp_dir, 'ucare.log')
+        synthetic_log.generate(log, args.events, args.noise)
+        eager_csv = os.path.join(tmp_dir, 'eager.csv')
+        bulk_csv = os.path.join(tmp_dir, 'bulk.csv')
+
+        before = rows_per_second(parse_v3.parse, log, eager_csv, args.repeat)
+        after = rows_per_second(lambda log, output: parse_v3.parse(log, output, bulk=True), log, bulk_csv, args.repeat)
+        with open(eager_csv) as eager, open(bulk_csv) as bulk:
+            assert eager.read() == bulk.read()
+
+        print('per field float()/round() : {:10.0f} events/sec'.format(before))
+        print('bulk numpy conversion     : {:10.0f} events/sec ({:.2f}x)'.format(after, after / before))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-e', '--events', type=int, default=20000, help='Number of GC events')
+    parser.add_argument('-n', '--noise', type=float, default=0.5, help='Share of noise lines')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Best of N runs')
+    main(parser.parse_args())
@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import resource
+import signal
+import sys
+import tempfile
+import time
+
+import parse_v3
+from benchmarks import synthetic_log
+
+# how often the fake JVMs append to their logs
+TICK = 0.1
+
+def run_daemon(logs_dir: str, output_dir: str, poll_interval: float):
+    try:
+        asyncio.run(parse_v3.ingest(logs_dir, output_dir, poll_interval=poll_interval, scan_interval=TICK))
+    except KeyboardInterrupt:
+        pass
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def caught_up(outputs, expected: bytes):
+    for output in outputs:
+        try:
+            with open(output, 'rb') as csv_file:
+                if csv_file.read() != expected:
+                    return False
+        except FileNotFoundError:
+            return False
+    return True
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # every JVM writes the same log, a slice of it every tick and cut anywhere, even inside a line
+        source = os.path.join(tmp_dir, 'source.log')
+        events = synthetic_log.generate(source, int(args.rate * args.duration), args.noise)
+        with open(source, 'rb') as source_file:
+            data = source_file.read()
+        parse_v3.parse(source, os.path.join(tmp_dir, 'expected.csv'))
+        with open(os.path.join(tmp_dir, 'expected.csv'), 'rb') as csv_file:
+            expected = csv_file.read()
+
+        logs_dir = os.path.join(tmp_dir, 'logs')
+        output_dir = os.path.join(tmp_dir, 'data')
+        os.makedirs(output_dir)
+        logs = []
+        for jvm in range(args.logs):
+            os.makedirs(os.path.join(logs_dir, 'jvm-{}'.format(jvm)))
+            logs.append(open(os.path.join(logs_dir, 'jvm-{}'.format(jvm), 'ucare.log'), 'wb'))
+        outputs = [os.path.join(output_dir, 'jvm-{}.ucare.log.csv'.format(jvm)) for jvm in range(args.logs)]
+
+        context = multiprocessing.get_context('spawn')
+        cpu_before = cpu_seconds()
+        daemon = context.Process(target=run_daemon, args=(logs_dir, output_dir, args.poll_interval))
+        daemon.start()
+        start_time = time.perf_counter()
+        ticks = max(1, int(args.duration / TICK))
+        for tick in range(1, ticks + 1):
+            for log in logs:
+                log.write(data[len(data) * (tick - 1) // ticks:len(data) * tick // ticks])
+                log.flush()
+            time.sleep(max(0.0, start_time + tick * TICK - time.perf_counter()))
+        for log in logs:
+            log.close()
+        written = time.perf_counter()
+
+        deadline = written + args.timeout
+        while not caught_up(outputs, expected) and time.perf_counter() < deadline:
+            time.sleep(TICK)
+        lag = time.perf_counter() - written
+        elapsed = time.perf_counter() - start_time
+        done = caught_up(outputs, expected)
+        os.kill(daemon.pid, signal.SIGINT)
+        daemon.join()
+        cpu = cpu_seconds() - cpu_before
+
+    print('{} logs, {} GC events each, written over {:.1f}s'.format(args.logs, events, written - start_time))
+    print('daemon CPU : {:.2f}s over {:.1f}s ({:.1%} of one core)'.format(cpu, elapsed, cpu / elapsed))
+    print('throughput : {:.0f} events/sec, caught up {:.2f}s after the last write'.format(
+        args.logs * events / elapsed, lag))
+    if not done:
+        print('Some outputs differ from parsing the whole log after {:.0f}s'.format(args.timeout))
+        sys.exit(1)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-l', '--logs', type=int, default=100, help='Number of JVMs writing a log each')
+    parser.add_argument('-r', '--rate', type=float, default=5, help='GC events per second written by each JVM')
+    parser.add_argument('-d', '--duration', type=float, default=20, help='Seconds the JVMs keep writing')
+    parser.add_argument('-n', '--noise', type=float, default=0.5, help='Share of noise lines')
+    parser.add_argument('-p', '--poll-interval', type=float, default=parse_v3.FOLLOW_POLL_INTERVAL,
+                        help='Seconds each log waits for new lines')
+    parser.add_argument('-t', '--timeout', type=float, default=60, help='Seconds to wait for the daemon to catch up')
+    main(parser.parse_args())
@@ -0,0 +1,45 @@
+import argparse
+import os
+import sys
+import tempfile
+
+from benchmarks import synthetic_log
+from benchmarks.parsers import measure
+
+SIZES = ['1G', '10G', '50G']
+
+# relative growth of peak RSS over the smallest log that counts as a regression
+TOLERANCE = 0.15
+
+def main(args):
+    results = []
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp_dir:
+        for size in args.sizes:
+            # one log at a time, the largest ones do not fit next to each other on small disks
+            log = os.path.join(tmp_dir, 'ucare.log')
+            output = os.path.join(tmp_dir, 'ucare.csv')
+            synthetic_log.generate(log, noise_ratio=args.noise, size=synthetic_log.parse_size(size))
+            log_size = os.path.getsize(log)
+            elapsed, events, rss = measure('parse_v3', log, output)
+            print('{:>6}: {:8.0f} MiB log, {:9} events in {:7.1f}s, peak RSS {:7.1f} MiB'.format(
+                size, log_size / 1024 ** 2, events, elapsed, rss))
+            results.append((size, rss))
+            os.remove(log)
+            os.remove(output)
+
+    smallest = results[0][1]
+    regressions = [(size, rss) for size, rss in results[1:] if rss > smallest * (1 + args.tolerance)]
+    for size, rss in regressions:
+        print('Peak RSS grew with the log: {:.1f} MiB at {} against {:.1f} MiB at {}'.format(
+            rss, size, smallest, results[0][0]))
+    if regressions:
+        sys.exit(1)
+    print('Peak RSS stayed within {:.0%} of {:.1f} MiB'.format(args.tolerance, smallest))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-s', '--sizes', nargs='+', default=SIZES, help='Log sizes to parse, smallest first')
+    parser.add_argument('-d', '--dir', help='Directory to write the logs to (default: the temp dir)')
+    parser.add_argument('-n', '--noise', type=float, default=0.5, help='Share of noise lines')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='Allowed relative growth of peak RSS')
+    main(parser.parse_args())
@@ -0,0 +1,136 @@
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from benchmarks import synthetic_log
+
+PARSERS = ['parse_v1', 'parse_v2', 'parse_v3']
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'parsers.json')
+
+# default relative change that counts as a regression when comparing to the baseline
+TOLERANCE = 0.15
+
+# parse_v3 --workers counts timed on top of the single process parse
+WORKERS = [2, 4]
+
+def run_parser(module_name: str, log: str, output: str, results, workers: int = 1):
+    # runs in a fresh process so ru_maxrss only covers this parser (its
+    # workers are processes of their own and not counted)
+    module = importlib.import_module(module_name)
+    start_time = time.perf_counter()
+    if workers > 1:
+        module.parse(log, output, workers=workers)
+    else:
+        module.parse(log, output)
+    elapsed = time.perf_counter() - start_time
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((elapsed, rss / 1024 if sys.platform != 'darwin' else rss / 1024 ** 2))
+
+def measure(module_name: str, log: str, output: str, workers: int = 1):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=run_parser, args=(module_name, log, output, results, workers))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError('{} failed on {} with exit code {}'.format(module_name, log, process.exitcode))
+    elapsed, rss = results.get()
+    with open(output) as csv_file:
+        events = sum(1 for _ in csv_file) - 1
+    return elapsed, events, rss
+
+def count_lines(log: str):
+    with open(log, 'rb') as log_file:
+        return sum(block.count(b'\n') for block in iter(lambda: log_file.read(1024 * 1024), b''))
+
+def best_of(module_name: str, log: str, output: str, lines: int, repeat: int, workers: int = 1):
+    best = None
+    for _ in range(repeat):
+        result = measure(module_name, log, output, workers)
+        if best is None or result[0] < best[0]:
+            best = result
+    elapsed, events, rss = best
+    return {
+        'lines_per_sec': round(lines / elapsed),
+        'events_per_sec': round(events / elapsed),
+        'events': events,
+        'peak_rss_mb': round(rss, 1),
+    }
+
+def run(args):
+    report = {
+        # the --workers results only carry over to a machine with as many cpus
+        'settings': {'events': args.events, 'noise': args.noise, 'seed': args.seed, 'cpus': os.cpu_count()},
+        'parsers': {},
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for module_name in args.parsers:
+            # same seed for every version, only the spelling of some lines differs
+            log = os.path.join(tmp_dir, '{}.log'.format(module_name))
+            synthetic_log.generate(log, args.events, args.noise, seed=args.seed, version=PARSERS.index(module_name) + 1)
+            lines = count_lines(log)
+            print('{}: {} lines, {:.1f} MiB'.format(module_name, lines, os.path.getsize(log) / 1024 ** 2))
+            output = os.path.join(tmp_dir, '{}.csv'.format(module_name))
+            report['parsers'][module_name] = best_of(module_name, log, output, lines, args.repeat)
+            if module_name != 'parse_v3':
+                continue
+            for workers in args.workers:
+                report['parsers']['{} -w {}'.format(module_name, workers)] = best_of(
+                    module_name, log, output, lines, args.repeat, workers)
+    return report
+
+def compare(report, baseline, tolerance: float = TOLERANCE):
+    # higher is better for throughput, lower is better for memory
+    regressions = []
+    if baseline['settings'] != report['settings']:
+        print('Baseline was recorded with {}, results may not be comparable'.format(baseline['settings']))
+    for module_name, result in report['parsers'].items():
+        if module_name not in baseline['parsers']:
+            continue
+        for metric, value in result.items():
+            before = baseline['parsers'][module_name][metric]
+            change = (value - before) / before if before else 0.0
+            worse = change < -tolerance if metric.endswith('_per_sec') else change > tolerance
+            if metric == 'events':
+                worse = value != before
+            print('{:10} {:16} {:>12} -> {:>12} ({:+.1%}){}'.format(
+                module_name, metric, before, value, change, '  REGRESSION' if worse else ''))
+            if worse:
+                regressions.append((module_name, metric))
+    return regressions
+
+def main(args):
+    report = run(args)
+    print(json.dumps(report['parsers'], indent=2))
+    if args.save:
+        os.makedirs(os.path.dirname(BASELINE), exist_ok=True)
+        with open(BASELINE, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print('Saved baseline {}'.format(BASELINE))
+    elif os.path.exists(BASELINE):
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-e', '--events', type=int, default=20000, help='Number of GC events')
+    parser.add_argument('-n', '--noise', type=float, default=0.5, help='Share of noise lines')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Best of N runs')
+    parser.add_argument('-p', '--parsers', nargs='+', default=PARSERS, choices=PARSERS, help='Parsers to run')
+    parser.add_argument('-w', '--workers', nargs='*', type=int, default=WORKERS,
+                        help='parse_v3 --workers counts to time besides the single process parse')
+    parser.add_argument('-t', '--tolerance', type=float, default=TOLERANCE, help='Relative change reported as a regression')
+    parser.add_argument('--save', action='store_true', help='Store the results as the new baseline')
+    main(parser.parse_args())
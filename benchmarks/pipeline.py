@@ -0,0 +1,54 @@
+import argparse
+import os
+import tempfile
+import time
+
+import parse_v3
+from benchmarks import synthetic_log
+
+def evict(filename):
+    # drops the log from the page cache so every run reads it from the device
+    with open(filename, 'rb') as log_file:
+        os.fsync(log_file.fileno())
+        os.posix_fadvise(log_file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+def events_per_second(parse, log: str, output: str, repeat: int, cold: bool):
+    best = float('inf')
+    for _ in range(repeat):
+        if cold:
+            evict(log)
+        start_time = time.perf_counter()
+        parse(log, output)
+        best = min(best, time.perf_counter() - start_time)
+    with open(output) as csv_file:
+        return (sum(1 for _ in csv_file) - 1) / best
+
+def main(args):
+    # run once with --dir on each device to compare, e.g. a spinning disk and an NVMe drive
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp_dir:
+        log = os.path.join(tmp_dir, 'ucare.log')
+        synthetic_log.generate(log, None if args.size else args.events, args.noise, size=args.size)
+        serial_csv = os.path.join(tmp_dir, 'serial.csv')
+        pipelined_csv = os.path.join(tmp_dir, 'pipelined.csv')
+
+        cold = not args.warm
+        before = events_per_second(parse_v3.parse, log, serial_csv, args.repeat, cold)
+        after = events_per_second(
+            lambda log, output: parse_v3.parse(log, output, pipeline=True), log, pipelined_csv, args.repeat, cold)
+        with open(serial_csv) as serial, open(pipelined_csv) as pipelined:
+            assert serial.read() == pipelined.read()
+
+        print('log of {:.1f} MiB in {} ({} page cache)'.format(
+            os.path.getsize(log) / 1024 / 1024, args.dir or tempfile.gettempdir(), 'warm' if args.warm else 'cold'))
+        print('serial loop : {:10.0f} events/sec'.format(before))
+        print('pipelined   : {:10.0f} events/sec ({:.2f}x)'.format(after, after / before))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-d', '--dir', help='Directory on the device to read and write on (default: the temp dir)')
+    parser.add_argument('-e', '--events', type=int, default=20000, help='Number of GC events')
+    parser.add_argument('-s', '--size', type=synthetic_log.parse_size, help='Approximate log size instead of -e, e.g. 1G')
+    parser.add_argument('-n', '--noise', type=float, default=0.5, help='Share of noise lines')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Best of N runs')
+    parser.add_argument('--warm', action='store_true', help='Keep the log in the page cache between runs')
+    main(parser.parse_args())
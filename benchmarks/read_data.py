@@ -0,0 +1,52 @@
+import argparse
+import concurrent.futures
+import itertools
+import os
+import shutil
+import tempfile
+import time
+
+import parse_v3
+import utilities
+from benchmarks import synthetic_log
+
+# the columns train_v3.py reads for the main model
+DATA_COL = ['gc_id', 'allocation_size', 'young_gen_total_objects', 'gc_time', 'young_gen_gc_time', 'phases']
+
+def read_seconds(paths, workers: int, repeat: int):
+    # the typed read_csv of every file in a pool of `workers` processes, or
+    # serially. the pool is timed even where read_data would not start it
+    best = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        if workers > 1:
+            with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+                list(executor.map(utilities.read_csv, paths, itertools.repeat(DATA_COL)))
+        else:
+            list(map(utilities.read_csv, paths, itertools.repeat(DATA_COL)))
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log = os.path.join(tmp_dir, 'ucare.log')
+        synthetic_log.generate(log, args.events, args.noise)
+        parse_v3.parse(log, os.path.join(tmp_dir, 'log0.csv'))
+        for index in range(1, max(args.files)):
+            shutil.copyfile(os.path.join(tmp_dir, 'log0.csv'), os.path.join(tmp_dir, 'log{}.csv'.format(index)))
+
+        print('{} cpus, {} events per csv file, pool of {} workers'.format(os.cpu_count(), args.events, args.workers))
+        for files in args.files:
+            paths = [os.path.join(tmp_dir, 'log{}.csv'.format(index)) for index in range(files)]
+            serial = read_seconds(paths, 1, args.repeat)
+            pool = read_seconds(paths, args.workers, args.repeat)
+            print('{:3} files: serial {:7.3f}s, pool {:7.3f}s ({:.2f}x)'.format(files, serial, pool, serial / pool))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-e', '--events', type=int, default=20000, help='Number of GC events per csv file')
+    parser.add_argument('-n', '--noise', type=float, default=0.5, help='Share of noise lines')
+    parser.add_argument('-f', '--files', type=int, nargs='+', default=[1, 2, 4, 8, 16], help='Numbers of csv files to read')
+    parser.add_argument('-w', '--workers', type=int, default=max(os.cpu_count(), 2), help='Processes of the pool')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Best of N runs')
+    main(parser.parse_args())
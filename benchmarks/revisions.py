@@ -0,0 +1,62 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks import synthetic_log
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# parses the log with the parse_v3 of one checkout, in a process of its own
+PARSE = '''
+import sys, time
+sys.path.insert(0, sys.argv[1])
+import parse_v3
+start_time = time.perf_counter()
+parse_v3.parse(sys.argv[2], sys.argv[3])
+print(time.perf_counter() - start_time)
+'''
+
+def parse_seconds(tree: str, log: str, output: str):
+    result = subprocess.run([sys.executable, '-c', PARSE, tree, log, output], cwd=tree,
+                            capture_output=True, text=True, check=True)
+    return float(result.stdout)
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log = os.path.join(tmp_dir, 'ucare.log')
+        synthetic_log.generate(log, args.events, args.noise, seed=args.seed)
+        trees = {}
+        try:
+            for revision in args.revisions:
+                tree = os.path.join(tmp_dir, 'tree{}'.format(len(trees)))
+                subprocess.run(['git', 'worktree', 'add', '--quiet', '--detach', tree, revision], cwd=ROOT, check=True)
+                trees[revision] = tree
+            # every round runs each revision once, so drift of the machine
+            # hits all of them alike
+            seconds = {revision: [] for revision in trees}
+            outputs = {}
+            for _ in range(args.rounds):
+                for revision, tree in trees.items():
+                    outputs[revision] = os.path.join(tmp_dir, '{}.csv'.format(os.path.basename(tree)))
+                    seconds[revision].append(parse_seconds(tree, log, outputs[revision]))
+            print('{} events, noise ratio {}, {} rounds'.format(args.events, args.noise, args.rounds))
+            for revision, times in seconds.items():
+                with open(outputs[revision], 'rb') as f:
+                    rows = sum(1 for _ in f) - 1
+                print('{:12} min {:6.3f}s  median {:6.3f}s  max {:6.3f}s  {} rows'.format(
+                    revision, min(times), statistics.median(times), max(times), rows))
+        finally:
+            for tree in trees.values():
+                subprocess.run(['git', 'worktree', 'remove', '--force', tree], cwd=ROOT, check=False)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('revisions', nargs='+', help='Git revisions to compare, e.g. a commit and its parent')
+    parser.add_argument('-e', '--events', type=int, default=20000, help='Number of GC events')
+    parser.add_argument('-n', '--noise', type=float, default=0.5, help='Share of noise lines')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('-r', '--rounds', type=int, default=7, help='Runs of every revision, interleaved')
+    main(parser.parse_args())
@@ -0,0 +1,77 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# what sweep drivers run over and over, with the heavy libraries each one may load
+CASES = [
+    ('parse_v1.py --help', ['parse_v1.py', '--help'], []),
+    ('parse_v2.py --help', ['parse_v2.py', '--help'], []),
+    ('parse_v3.py --help', ['parse_v3.py', '--help'], []),
+    ('train_v2.py --help', ['train_v2.py', '--help'], []),
+    ('train_v3.py --help', ['train_v3.py', '--help'], []),
+    ('inference_v1.py --help', ['inference_v1.py', '--help'], []),
+    ('inference_v2.py --help', ['inference_v2.py', '--help'], []),
+    ('inference_v3.py --help', ['inference_v3.py', '--help'], []),
+    ('inference_v4.py --help', ['inference_v4.py', '--help'], []),
+    ('validate config/train_v3.json', [
+        '-c', "import utilities; utilities.read_json_config('config/train_v3.json', utilities.Task.train)",
+    ], ['jsonschema']),
+]
+
+HEAVY = ['numpy', 'pandas', 'joblib', 'jsonschema', 'tqdm', 'asyncio', 'sklearn', 'statsmodels', 'scipy', 'seaborn']
+
+# milliseconds of imports a case may spend, stdlib included and the heavy libraries it may load left out
+BUDGET = 100
+
+def import_times(argv):
+    # cumulative microseconds of every top level import, from `python -X importtime`
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + argv, cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.rstrip()] = int(cumulative)
+    return times
+
+def measure(argv, allowed, repeat: int):
+    # best of `repeat` runs: wall time, import time, the part of it spent on
+    # the `allowed` libraries and the modules loaded
+    best_wall, best_imports, best_allowed, modules = float('inf'), float('inf'), float('inf'), set()
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        times = import_times(argv)
+        best_wall = min(best_wall, time.perf_counter() - start_time)
+        top_level = {name: cumulative for name, cumulative in times.items() if not name.startswith('  ')}
+        best_imports = min(best_imports, sum(top_level.values()) / 1000)
+        best_allowed = min(best_allowed, sum(
+            cumulative for name, cumulative in top_level.items() if name.strip().split('.')[0] in allowed) / 1000)
+        modules = {name.strip() for name in times}
+    return best_wall * 1000, best_imports, best_allowed, modules
+
+def main(args):
+    failed = False
+    for label, argv, allowed in CASES:
+        wall, imports, allowed_imports, modules = measure(argv, allowed, args.repeat)
+        heavy = [package for package in HEAVY if package not in allowed and (
+            package in modules or any(module.startswith(package + '.') for module in modules))]
+        over = imports - allowed_imports > args.budget
+        print('{:32}: {:7.1f} ms wall, {:7.1f} ms imports{}{}{}'.format(
+            label, wall, imports,
+            ' ({:.1f} ms of them {})'.format(allowed_imports, ', '.join(allowed)) if allowed else '',
+            ' over budget' if over else '', ' loads ' + ', '.join(heavy) if heavy else ''))
+        failed = failed or over or bool(heavy)
+    if failed:
+        sys.exit(1)
+    print('Every case imported within {} ms and without a heavy library it does not need'.format(args.budget))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-b', '--budget', type=float, default=BUDGET, help='Milliseconds of imports allowed per case')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Best of N runs')
+    main(parser.parse_args())
@@ -0,0 +1,118 @@
+import argparse
+import random
+
+NOISE_LINES = [
+    '[{ts:.3f}s][info][safepoint] Application time: {value:.7f} seconds\n',
+    '[{ts:.3f}s][info][safepoint] Total time for which application threads were stopped: {value:.7f} seconds\n',
+    '[{ts:.3f}s][debug][gc,heap] Expanding heap by {count}K\n',
+    '[{ts:.3f}s][info][gc,task] Worker {count} done\n',
+]
+
+def noise_line(rng: random.Random, ts: float):
+    return rng.choice(NOISE_LINES).format(ts=ts, value=rng.random(), count=rng.randint(0, 10**6))
+
+def summary_line(rng: random.Random, context: str, gc_id: int):
+    # parse_v1 brackets every GC with these and reads the heap from PS*Gen lines
+    return '  summaries: context={}, gc_id={}, live_objects={}, dead_objects={}, total_objects={}, elapsed={:.3f}ms\n'.format(
+        context, gc_id, rng.randint(0, 10**5), rng.randint(0, 10**5), rng.randint(0, 10**5), rng.random())
+
+def event_lines(rng: random.Random, gc_id: int, old_format: bool = False, version: int = 3):
+    ts = '[{:.3f}s]'.format(gc_id * 0.1)
+    yield '{} [GC Start id={}]\n'.format(ts, gc_id)
+    if version == 1:
+        yield summary_line(rng, 'BeforeGC', gc_id)
+        yield summary_line(rng, 'YoungGen', gc_id)
+        if rng.random() < 0.5:
+            yield summary_line(rng, 'OldGen', gc_id)
+    yield '{} [Mem allocate size {} bytes]\n'.format(ts, rng.randint(1, 10**6))
+    if version == 3:
+        yield '{} [GCParallelWorkers, {}]\n'.format(ts, rng.randint(1, 8))
+    yield '{} [Phase gc_id={} {{phases: pre mark sweep post end x}}]\n'.format(ts, gc_id)
+    if rng.random() < 0.9:
+        yield ('{} [TraceCountRootOopClosureContainer: context=YoungGen, live_objects={}, dead_objects={}, '
+               'total_objects={}, elapsed={:.3f}ms]\n').format(
+                   ts, rng.randint(0, 10**5), rng.randint(0, 10**5), rng.randint(0, 10**5), rng.random())
+    if rng.random() < 0.5:
+        yield ('{} [TraceCountRootOopClosureContainer: context=OldGen, live_objects={}, dead_objects={}, '
+               'total_objects={}, elapsed={:.3f}ms]\n').format(
+                   ts, rng.randint(0, 10**5), rng.randint(0, 10**5), rng.randint(0, 10**5), rng.random())
+    for stripe in range(rng.randint(0, 4) if version == 3 else 0):
+        yield ('{} [OldToYoungRootsTaskGeneralInfo stripe_num={}, stripe_total=4, ssize={}, start_card={}, '
+               'end_card={}, slice_width={}, distance={}, slice_counter={}, dirty_card_counter={}, '
+               'objects_scanned_counter={}, card_increment_counter={}, '
+               'total_max_card_pointer_being_walked_through={}, elapsed={:.3f}ms]\n').format(
+                   ts, stripe, *[rng.randint(0, 10**4) for _ in range(10)], rng.random())
+    if version == 1:
+        yield ' PSYoungGen      total {}K, used {}K [0x00000000d5580000, 0x0000000100000000)\n'.format(
+            rng.randint(0, 10**6), rng.randint(0, 10**6))
+        yield ' ParOldGen       total {}K, used {}K [0x0000000080000000, 0x00000000d5580000)\n'.format(
+            rng.randint(0, 10**6), rng.randint(0, 10**6))
+    if rng.random() < 0.8:
+        yield '{} [YoungGen size, capacity={}B used={}B free={}B]\n'.format(
+            ts, rng.randint(0, 10**9), rng.randint(0, 10**9), rng.randint(0, 10**9))
+    if rng.random() < 0.8:
+        yield '{} [OldGen size, capacity={}K used={}K free={}K]\n'.format(
+            ts, rng.randint(0, 10**7), rng.randint(0, 10**7), rng.randint(0, 10**7))
+    if rng.random() < 0.7:
+        yield '{} [StringTableInfo table_size=60013, processed={}, removed={}]\n'.format(
+            ts, rng.randint(0, 10**5), rng.randint(0, 100))
+        if old_format:
+            yield '{} [StringTableTime], {:.3f} ms]\n'.format(ts, rng.random() * 5)
+        else:
+            yield '{} [StringTableTime, {:.3f} ms]\n'.format(ts, rng.random() * 5)
+    if rng.random() < 0.6:
+        yield '{} [PruneScavengeRootNmethods, {}]\n'.format(ts, rng.randint(0, 500))
+        yield '{} [{}, {:.4f} secs]\n'.format(ts, 'PruneScavenge' if version == 2 else 'PruneScavengeTime', rng.random() / 100)
+    yield '{} [YoungGenTime, {:.3f} ms]\n'.format(ts, rng.random() * 10)
+    if rng.random() < 0.3:
+        yield '{} [OldGenTime, {:.3f} ms]\n'.format(ts, rng.random() * 10)
+    yield '{} [GC Time, {:.3f} ms]\n'.format(ts, rng.random() * 50)
+    yield '{} [GC Finish id={}]\n'.format(ts, gc_id)
+    if version == 1:
+        yield summary_line(rng, 'AfterGC', gc_id)
+
+def generate(output, events: int = None, noise_ratio: float = 0.5, old_format: bool = False,
+             seed: int = 42, size: int = None, version: int = 3):
+    # writes `events` GC events, or as many as it takes to reach `size` bytes.
+    # noise_ratio is the share of lines that no parser branch is interested in,
+    # version picks the parse_v1/v2/v3 spelling of the log
+    rng = random.Random(seed)
+    written = 0
+    gc_id = 0
+    with open(output, 'w') as log_file:
+        while (events is None or gc_id < events) and (size is None or written < size):
+            for line in event_lines(rng, gc_id, old_format, version):
+                while rng.random() < noise_ratio:
+                    noise = noise_line(rng, gc_id * 0.1)
+                    log_file.write(noise)
+                    written += len(noise)
+                log_file.write(line)
+                written += len(line)
+            gc_id += 1
+    return gc_id
+
+def parse_size(value: str):
+    # 512K, 100M, 10G
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    if value[-1].upper() in units:
+        return int(float(value[:-1]) * units[value[-1].upper()])
+    return int(value)
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-o', '--output', help='Output log file', required=True)
+    parser.add_argument('-e', '--events', type=int, help='Number of GC events, 10000 unless --size is given')
+    parser.add_argument('-s', '--size', type=parse_size, help='Stop once the log reaches this size, e.g. 500M or 10G')
+    parser.add_argument('-n', '--noise', type=float, default=0.5, help='Share of noise lines')
+    parser.add_argument('--old-format', action='store_true', help='Write the old StringTableTime format')
+    parser.add_argument('-v', '--version', type=int, default=3, choices=[1, 2, 3], help='Log version, matching parse_v1/v2/v3')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    args = parser.parse_args()
+    if args.events is None and args.size is None:
+        args.events = 10000
+    return args
+
+if __name__ == '__main__':
+    args = get_args()
+    events = generate(args.output, args.events, args.noise, args.old_format, args.seed, args.size, args.version)
+    print('Wrote {} GC events to {}'.format(events, args.output))
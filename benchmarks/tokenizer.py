@@ -0,0 +1,90 @@
+import argparse
+import os
+import tempfile
+import time
+
+import parse_v3
+from benchmarks import synthetic_log
+
+# how parse_v3 read key=value lines before parse_key_values
+def parse_line_summaries(line: str, skip_num: int):
+    new_line = line.replace(',', '')
+    infos = new_line.split()[skip_num:]
+    result = {}
+    for info in infos:
+        # only contains two elements if splitted
+        key, value, *rest = info.split('=')
+        assert(len(rest) == 0)
+        value = value.replace(']', '')
+        if (key == 'elapsed'):
+            result[key] = parse_v3.convert_time(value)
+        else:
+            try:
+                result[key] = float(value)
+            except:
+                result[key] = value
+    return result
+
+def retry_old_to_young_roots_task(line: str):
+    iterate = 0
+    while True:
+        try:
+            return parse_line_summaries(line, iterate)
+        except:
+            iterate += 1
+
+def retry_heap(line: str):
+    heap_str = line.replace(',', '')
+    heap_infos = heap_str.split()[3:]
+    result = {}
+    for info in heap_infos:
+        key, value, *rest = info.split('=')
+        assert(len(rest) == 0)
+        value = value.replace(']', '')
+        result[key] = parse_v3.convert_size(value)
+    return result
+
+def retry_stringtable_info(line: str):
+    return parse_line_summaries(parse_v3.skip_prestr(line, 'StringTableInfo').rstrip(']\n'), 0)
+
+# line kind -> (marker, old parser, new parser)
+KINDS = {
+    'otyrt': (
+        'OldToYoungRootsTaskGeneralInfo',
+        retry_old_to_young_roots_task,
+        lambda line: parse_v3.parse_key_values(line, parse_v3.SUMMARY_SCHEMA),
+    ),
+    'heap': ('Gen size', retry_heap, parse_v3.parse_heap),
+    'stringtable': ('StringTableInfo', retry_stringtable_info, parse_v3.parse_stringtable_info),
+}
+
+def lines_per_second(parse, lines, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for line in lines:
+            parse(line)
+        best = min(best, time.perf_counter() - start_time)
+    return len(lines) / best
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log = os.path.join(tmp_dir, 'ucare.log')
+        synthetic_log.generate(log, args.events, 0.0)
+        with open(log) as log_file:
+            lines = log_file.readlines()
+
+    for kind, (marker, before_parse, after_parse) in KINDS.items():
+        kind_lines = [line for line in lines if marker in line]
+        for line in kind_lines:
+            assert before_parse(line) == after_parse(line), line
+        before = lines_per_second(before_parse, kind_lines, args.repeat)
+        after = lines_per_second(after_parse, kind_lines, args.repeat)
+        print('{:12} {:7} lines  before {:10.0f} lines/sec  after {:10.0f} lines/sec ({:.2f}x)'.format(
+            kind, len(kind_lines), before, after, after / before))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-e', '--events', type=int, default=20000, help='Number of GC events')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Best of N runs')
+    main(parser.parse_args())
@@ -1,15 +1,5 @@
-from datetime import datetime
-
-import math
-
-import numpy as np
-import pandas as pd
-import seaborn as sbn
-
 import subprocess
 
-from tqdm import tqdm
-
 from model import save_diff
 
 import utilities
@@ -27,9 +17,7 @@ NUM_COL = len(DATA_COL)
 
 def prepare_dataset(config, columns = DATA_COL):
     print('Reading data...')
-    dataset = utilities.read_data([
-        '{}/{}'.format(config['dir']['data'], data['name']) for data in config['data']
-    ], columns)
+    dataset = utilities.read_dataset(config['dir']['data'], config['data'], columns)
     return dataset
 
 def test_predictor(dataset, main_predictor, stringtable_predictor, prune_predictor):
@@ -49,6 +37,7 @@ def test_predictor(dataset, main_predictor, stringtable_predictor, prune_predict
     return mse, r2
 
 def generate_diff(dataset, main_predictor, stringtable_predictor, prune_predictor):
+    import numpy as np
     X_main = dataset.iloc[:, :-3]
     X_stringtable = dataset.iloc[:, 2:-2]
     X_prune = dataset.iloc[:, 3:-1]
@@ -163,6 +152,7 @@ def save_plots(config, cdf_dir: str, gnuplot_dir: str, output_dir: str):
     subprocess.Popen('gnuplot {}/{}-diff.plt'.format(gnuplot_dir, output_name).split())
 
 def main(args):
+    from tqdm import tqdm
     print('Reading config...')
     config = utilities.read_json_config(args.config, utilities.Task.inference)
     print('Preparing output directory...')
@@ -1,15 +1,5 @@
-from datetime import datetime
-
-import math
-
-import numpy as np
-import pandas as pd
-import seaborn as sbn
-
 import subprocess
 
-from tqdm import tqdm
-
 from model import save_diff
 
 import utilities
@@ -45,9 +35,7 @@ COMBINED_COL = MAIN_COL + STRINGTABLE_COL + OTYRT_COL + TARGET_COL
 
 def prepare_dataset(config, columns = COMBINED_COL):
     print('Reading data...')
-    dataset = utilities.read_data([
-        '{}/{}'.format(config['dir']['data'], data['name']) for data in config['data']
-    ], columns)
+    dataset = utilities.read_dataset(config['dir']['data'], config['data'], columns)
     return dataset
 
 def test_predictor(dataset, main_predictor, stringtable_predictor, otyrt_predictor):
@@ -67,6 +55,7 @@ def test_predictor(dataset, main_predictor, stringtable_predictor, otyrt_predict
     return mse, r2
 
 def generate_diff(config, dataset, main_predictor, stringtable_predictor, otyrt_predictor):
+    import numpy as np
     X_main = dataset.loc[:, MAIN_COL]
     X_stringtable = dataset.loc[:, STRINGTABLE_COL]
     X_otyrt = dataset.loc[:, OTYRT_COL]
@@ -187,6 +176,7 @@ def save_plots(config, cdf_dir: str, gnuplot_dir: str, output_dir: str):
     subprocess.Popen('gnuplot {}/{}-diff.plt'.format(gnuplot_dir, output_name).split())
 
 def main(args):
+    from tqdm import tqdm
     print('Reading config...')
     config = utilities.read_json_config(args.config, utilities.Task.inference)
     print('Preparing output directory...')
@@ -1,6 +1,3 @@
-from tqdm import tqdm
-import numpy as np
-
 def get_model_name(model: str):
     if model == 'ransac':
         return 'RANSAC Linear Regression'
@@ -8,6 +5,10 @@ def get_model_name(model: str):
         return 'Linear Regression'
     elif model == 'svr':
         return 'Support Vector Regression'
+    elif model == 'sgd':
+        return 'SGD Linear Regression'
+    elif model == 'streaming_ols':
+        return 'Streaming Linear Regression'
     else:
         return ''
 
@@ -45,7 +46,78 @@ def prepare_trainer(config):
 
     return predictor_trainers
 
+# passes of sgd over the training rows
+SGD_EPOCHS = 5
+
+class StreamingOLS:
+    # ordinary least squares from X'X and X'y summed chunk by chunk, the same
+    # fit whatever the chunk size in memory of n_features ** 2
+    def __init__(self, add_constant=False):
+        self.add_constant = add_constant
+        self.rows = 0
+        self.xtx = None
+        self.xty = None
+        self.coef_ = None
+
+    def design(self, X):
+        import numpy as np
+        X = np.asarray(X, dtype=float)
+        if self.add_constant:
+            X = np.column_stack([np.ones(len(X)), X])
+        return X
+
+    def partial_fit(self, X, y):
+        import numpy as np
+        X = self.design(X)
+        y = np.asarray(y, dtype=float)
+        if self.xtx is None:
+            self.xtx = np.zeros((X.shape[1], X.shape[1]))
+            self.xty = np.zeros(X.shape[1])
+        self.rows += len(X)
+        self.xtx += X.T @ X
+        self.xty += X.T @ y
+        # minimum norm solution like statsmodels when X'X is singular
+        self.coef_ = np.linalg.lstsq(self.xtx, self.xty, rcond=None)[0]
+        return self
+
+    def predict(self, X):
+        return self.design(X) @ self.coef_
+
+def prepare_streaming_trainer(config):
+    # trainers of the models fit without the whole dataset in memory, `chunks`
+    # returns a new iterator of (X, y) training chunks for every pass
+    def train_streaming_ols(chunks, add_constant=False):
+        ols = StreamingOLS(add_constant)
+        for X, y in chunks():
+            ols.partial_fit(X, y)
+        return ols
+
+    def train_sgd(chunks):
+        from sklearn.linear_model import SGDRegressor
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import StandardScaler
+        # sgd needs scaled features, the scaler gets a pass of its own first
+        scaler = StandardScaler()
+        for X, _ in chunks():
+            scaler.partial_fit(X)
+        sgd = SGDRegressor(random_state=42)
+        for _ in range(SGD_EPOCHS):
+            for X, y in chunks():
+                sgd.partial_fit(scaler.transform(X), y)
+        return make_pipeline(scaler, sgd)
+
+    predictor_trainers = {}
+
+    if 'sgd' in config['models']:
+        predictor_trainers['sgd'] = train_sgd
+
+    if 'streaming_ols' in config['models']:
+        predictor_trainers['streaming_ols'] = train_streaming_ols
+
+    return predictor_trainers
+
 def train_predictor(config, trainers, dataset):
+    from tqdm import tqdm
     predictors = {}
 
     X_train, _, y_train, _ = dataset['splitted_dataset']
@@ -64,6 +136,7 @@ def train_predictor(config, trainers, dataset):
     return predictors
 
 def test_predictor(predictors, dataset):
+    from tqdm import tqdm
     def test(_model, X, y):
         from sklearn.metrics import mean_squared_error, r2_score
         y_pred = _model.predict(X)
@@ -89,7 +162,54 @@ def test_predictor(predictors, dataset):
 
     return result
 
+def train_streaming_predictor(config, trainers, chunks):
+    from tqdm import tqdm
+    predictors = {}
+
+    pbar = tqdm(trainers)
+    for trainer in pbar:
+        pbar.set_description('Training predictor with algorithm {}'.format(trainer))
+        if 'ols' in trainer:
+            predictors[trainer] = trainers[trainer](chunks, config['sm_add_constant'])
+        else:
+            predictors[trainer] = trainers[trainer](chunks)
+
+    return predictors
+
+def test_streaming_predictor(predictors, chunks):
+    # test_predictor over test chunks, every predictor in the same pass. the
+    # variance of y for r2 is merged chunk by chunk (Chan et al.)
+    import numpy as np
+    rows, mean, m2 = 0, 0.0, 0.0
+    sse = {predictor: 0.0 for predictor in predictors}
+    for X, y in chunks():
+        y = np.asarray(y, dtype=float)
+        for predictor in predictors:
+            sse[predictor] += float(np.sum((np.asarray(predictors[predictor].predict(X), dtype=float) - y) ** 2))
+        delta = y.mean() - mean
+        total = rows + len(y)
+        m2 += float(np.sum((y - y.mean()) ** 2)) + delta ** 2 * rows * len(y) / total
+        mean += delta * len(y) / total
+        rows = total
+    if rows == 0:
+        # mean_squared_error raises on an empty test set as well
+        raise ValueError('no test rows to score the predictors on, the dataset has too few rows')
+
+    result = {}
+    for predictor in predictors:
+        mse = sse[predictor] / rows
+        # r2_score of a constant y: 1 for a perfect prediction, 0 otherwise
+        r2 = 1 - sse[predictor] / m2 if m2 else float(sse[predictor] == 0)
+        print('Test dataset with algorithm {}'.format(predictor))
+        print('Mean squared error: %.8f' % mse)
+        print('Coefficient of determination: %.8f' % r2)
+        result[predictor] = mse, r2
+
+    return result
+
 def generate_diff(config, predictors, predictor, dataset):
+    import numpy as np
+    from tqdm import tqdm
     pbar = tqdm(predictors)
     result = {}
     _dataset = dataset['predict']
@@ -112,6 +232,8 @@ def generate_diff(config, predictors, predictor, dataset):
 
 
 def save_diff(config, out_dir, predictor, diff):
+    import numpy as np
+    from tqdm import tqdm
     diff_sorted_idx = np.argsort(diff, axis=0)
     diff_sorted_idx = diff_sorted_idx[config['skip_value']:]
         
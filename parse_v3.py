@@ -1,15 +1,86 @@
 import sys
 import os
+import io
+import gzip
+import lzma
+import queue
+import mmap
+import array
+import struct
 import csv
 import re
 import json
-
-from tqdm import tqdm
-
+import contextlib
+import math
+import time
+import types
+import hashlib
+import traceback
+import itertools
+import collections
+import threading
+import glob
+import multiprocessing
+import concurrent.futures
+
+# numpy, tqdm and asyncio are imported where they are used, `--help` loads none
+# of them and a csv parse neither numpy nor asyncio
 import utilities
 
 HEAP_REGEX='(.*?)total(.*?), used(.[A-Za-z0-9_*-]*)'
 
+# more chunks than workers keeps the pool busy when GC density is uneven
+CHUNKS_PER_WORKER = 4
+
+NPY_HEADER_SIZE = 128
+COLUMNAR_BATCH_SIZE = 4096
+
+# finished events handed to the writer at once
+ROW_BATCH_SIZE = 1024
+
+# a memory mapped log is scanned in windows of this many bytes, the pages of a
+# window are dropped once it is done so RSS does not grow with the log
+SCAN_WINDOW_SIZE = 64 * 1024 * 1024
+# upper bound of a --workers chunk, whose rows are held until it is written
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+
+# bytes hashed at the head of the log and right before the checkpoint
+CHECKPOINT_HASH_SIZE = 1024 * 1024
+
+COMPRESSION_MAGIC = {
+    b'\x1f\x8b': 'gzip',
+    b'\xfd7zXZ\x00': 'xz',
+    b'\x28\xb5\x2f\xfd': 'zstd',
+}
+DECOMPRESS_BLOCK_SIZE = 4 * 1024 * 1024
+DECOMPRESS_PREFETCH = 4
+
+# --pipeline: blocks read ahead of the scanner and row batches queued for the writer
+PIPELINE_BLOCK_SIZE = 4 * 1024 * 1024
+PIPELINE_PREFETCH = 4
+PIPELINE_ROW_BATCHES = 8
+
+FOLLOW_BLOCK_SIZE = 4 * 1024 * 1024
+FOLLOW_POLL_INTERVAL = 1.0
+
+# --watch: logs picked up under the watched directory, how often it is
+# searched for new ones and how often each log saves its checkpoint
+INGEST_PATTERN = '**/ucare.log'
+INGEST_SCAN_INTERVAL = 10.0
+INGEST_CHECKPOINT_INTERVAL = 30.0
+
+# head of the log read to tell the format version and the StringTableTime spelling
+SNIFF_SIZE = 256 * 1024
+
+# what follows the name of the live log in its rolled over logs, `ucare.log.3`,
+# `ucare.log.3.gz` or the JVM's own `ucare.log.3.current`
+ROTATED_SUFFIX_REGEX = re.compile(r'\.(\d+)(\.current)?(\.gz|\.xz|\.zst)?')
+
+# one entry of the `<output>.idx` event index: gc_id, offset of the
+# `GC Start` line and offset right after the `GC Finish` line
+INDEX_ENTRY = struct.Struct('<qQQ')
+INDEX_DTYPE = [('gc_id', '<i8'), ('start', '<u8'), ('end', '<u8')]  # numpy dtype of the entries
+
 CSV_COL = [
     # general info
     'gc_id',
@@ -18,6 +89,11 @@ CSV_COL = [
     'parallel_workers',
 
     # Oops
+    'before_gc_live_objects',
+    'before_gc_dead_objects',
+    'before_gc_total_objects',
+    'before_gc_roots_walk_elapsed',
+
     'young_gen_live_objects',
     'young_gen_dead_objects',
     'young_gen_total_objects',
@@ -70,6 +146,17 @@ CSV_COL = [
     'gc_time',
 ]
 
+# array typecode of every column in the columnar output, phases are stored
+# as int32 codes into the manifest categories, the rest is float64
+COLUMN_TYPES = {
+    'gc_id': 'q',
+    'phases': 'i',
+    'parallel_workers': 'i',
+    'prune_nmethod_pointer_count': 'q',
+}
+
+OUTPUT_FORMATS = ['csv', 'columnar']
+
 def skip_prestr(line: str, prestr: str):
     first_index_of_prestr = line.find(prestr)
     last_index_of_prestr = first_index_of_prestr + len(prestr)
@@ -92,23 +179,40 @@ def convert_size(line: str):
         size = size / 1000.0
     return round(size, 3)
 
-def parse_line_summaries(line: str, skip_num: int):
-    new_line = line.replace(',', '')
-    infos = new_line.split()[skip_num:]
-    result = {}
-    for info in infos:
-        # only contains two elements if splitted
-        key, value, *rest = info.split('=')
-        assert(len(rest) == 0)
-        value = value.replace(']', '')
-        if (key == 'elapsed'):
-            result[key] = convert_time(value)
-        else:
-            try:
-                result[key] = float(value)
-            except:
-                result[key] = value
-    return result
+# converters of the key=value lines that are not plain numbers. the context
+# of a summary is a name, converting it would raise for every line
+SUMMARY_SCHEMA = {
+    'context': str,
+    'elapsed': convert_time,
+}
+
+def to_number(value: str):
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+def key_value_pairs(line: str):
+    # the key=value pairs at the end of the line, from the token with the
+    # first `=` on. if a token after it is no key=value the pairs only start
+    # behind the last such token, which is where the old retry loop over
+    # skip_num ended up
+    line = line.replace(',', '').replace(']', '')
+    start = line.rfind(' ', 0, line.find('=')) + 1
+    tokens = line[start:].split()
+    if line.count('=', start) != len(tokens):
+        first = len(tokens)
+        while first > 0 and tokens[first - 1].count('=') == 1:
+            first -= 1
+        tokens = tokens[first:]
+    return [token.split('=') for token in tokens]
+
+def parse_key_values(line: str, schema: dict = None, default = to_number):
+    # `schema` maps keys to their converter
+    pairs = key_value_pairs(line)
+    if schema is None:
+        return {key: default(value) for key, value in pairs}
+    return {key: schema.get(key, default)(value) for key, value in pairs}
 
 def parse_gc_id(line: str, prestr: str):
     gc_id_str = skip_prestr(line, prestr).rstrip(']\n')
@@ -116,35 +220,41 @@ def parse_gc_id(line: str, prestr: str):
     return gc_id
 
 def parse_heap(line: str):
-    heap_str = line.replace(',', '')
-    heap_infos = heap_str.split()[3:]
-    result = {}
-    for info in heap_infos:
-        # only contains two elements if splitted
-        key, value, *rest = info.split('=')
-        assert(len(rest) == 0)
-        value = value.replace(']', '')
-        result[key] = convert_size(value)
-    return result
+    return parse_key_values(line, default=convert_size)
 
-def parse_gc_time(line: str, prestr = 'GC Time'):
+def parse_heap_size(line: str):
+    total = 0.0
+    used = 0.0
+    result = re.search(HEAP_REGEX, line)
+    if result:
+        total = convert_size(result[2])
+        used = convert_size(result[3])
+    return (total, used)
+
+# the *_token helpers cut the value out of a line, the parse_* ones also
+# convert it. BulkGCEventParser keeps the tokens for BulkConverter
+
+def gc_time_token(line: str, prestr = 'GC Time'):
     gc_time_str = skip_prestr(line, prestr).rstrip(']\n')
     if ('secs' in gc_time_str):
         gc_time_str = gc_time_str.replace('secs', 's')
     gc_time_str = gc_time_str.replace(' ', '')
     gc_time_str = gc_time_str.split(',')
     assert(len(gc_time_str) == 2)
-    gc_time = convert_time(gc_time_str[1])
-    return gc_time
+    return gc_time_str[1]
 
-def parse_allocation_size(line: str):
+def parse_gc_time(line: str, prestr = 'GC Time'):
+    return convert_time(gc_time_token(line, prestr))
+
+def allocation_size_token(line: str):
     prestr = 'Mem allocate size'
     alloc_size_str = skip_prestr(line, prestr).rstrip(']\n')
     if 'bytes' in alloc_size_str:
         alloc_size_str = alloc_size_str.replace('bytes', 'B')
-    alloc_size_str = alloc_size_str.replace(' ', '')
-    alloc_size = convert_size(alloc_size_str)
-    return alloc_size
+    return alloc_size_str.replace(' ', '')
+
+def parse_allocation_size(line: str):
+    return convert_size(allocation_size_token(line))
 
 def parse_phases(line: str):
     prestr = '{'
@@ -152,295 +262,1770 @@ def parse_phases(line: str):
     phases = ';'.join(phases_str.split(' ')[1:-2])
     return phases
 
-def parse_trace_time(line: str, prestr: str):
+def trace_time_token(line: str, prestr: str):
     gc_time = prestr in 'GC Time'
     time_str = skip_prestr(line, prestr).rstrip(']\n')
     if ('secs' in time_str):
         time_str = time_str.replace('secs', 's')
     time_str = time_str.replace(' ', '')
-    time = 0.0
     if gc_time:
         time_str = time_str.split(',')
         assert(len(time_str) == 2)
-        time = convert_time(time_str[1])
-    else:
-        time = convert_time(time_str)
-    return time
+        return time_str[1]
+    return time_str
+
+def parse_trace_time(line: str, prestr: str):
+    return convert_time(trace_time_token(line, prestr))
 
 def parse_stringtable_info(line: str):
-    prestr = 'StringTableInfo'
-    info_str = skip_prestr(line, prestr).rstrip(']\n')
-    info_str = info_str.replace(',', '')
-    infos = info_str.split()
-    result = {}
-    for info in infos:
-        # only contains two elements if splitted
-        key, value, *rest = info.split('=')
-        assert(len(rest) == 0)
-        value = value.replace(']', '')
-        if (key == 'elapsed'):
-            result[key] = convert_time(value)
-        else:
-            try:
-                result[key] = float(value)
-            except:
-                result[key] = value
-    return result
+    return parse_key_values(line, SUMMARY_SCHEMA)
 
-def parse_number(line: str, prestr: str):
+def number_token(line: str, prestr: str):
     # prestr = 'PruneScavengeRootNmethods'
     number_str = skip_prestr(line, prestr).rstrip(']\n')
-    number_str = number_str.replace(',', '').strip()
-    number = int(number_str)
-    return number
+    return number_str.replace(',', '').strip()
 
-def parse(filename, output, old_format: bool = False):
-    with open(filename) as log_file:
-        with open(output, 'w', newline='') as csv_file:
-            writer = csv.writer(csv_file)
-            writer.writerow(CSV_COL)
-            
+def parse_number(line: str, prestr: str):
+    return int(number_token(line, prestr))
+
+# value of every column for a GC event that lacks the corresponding lines.
+# the int zeros are kept apart from the float ones since they show up
+# differently in the csv
+RECORD_DEFAULTS = {
+    'gc_id': -99,
+    'phases': None,
+    'parallel_workers': 0,
+    'young_gen_live_objects': 0,
+    'young_gen_dead_objects': 0,
+    'young_gen_total_objects': 0,
+    'prune_nmethod_pointer_count': 0,
+    'otyrt_stripe_total': 0,
+    'otyrt_ssize': 0,
+    'otyrt_start_card': 0,
+    'otyrt_end_card': 0,
+    'otyrt_slice_width': 0,
+    'otyrt_distance': 0,
+    'otyrt_slice_counter': 0,
+    'otyrt_dirty_card_counter': 0,
+    'otyrt_objects_scanned_counter': 0,
+    'otyrt_card_increment_counter': 0,
+    'otyrt_total_max_card_pointer_being_walked_through': 0,
+    'otyrt_time': 0,
+}
+
+DEFAULT_RECORD = [RECORD_DEFAULTS.get(column, 0.0) for column in CSV_COL]
+
+# keys of the parsed line that fill consecutive columns, starting at the given one
+SUMMARY_KEYS = ['live_objects', 'dead_objects', 'total_objects', 'elapsed']
+HEAP_KEYS = ['capacity', 'used', 'free']
+STRINGTABLE_KEYS = ['table_size', 'processed', 'removed']
+OTYRT_KEYS = [
+    'stripe_total',
+    'ssize',
+    'start_card',
+    'end_card',
+    'slice_width',
+    'distance',
+    'slice_counter',
+    'dirty_card_counter',
+    'objects_scanned_counter',
+    'card_increment_counter',
+    'total_max_card_pointer_being_walked_through',
+]
+
+GC_ID = CSV_COL.index('gc_id')
+BEFORE_GC_SUMMARY = CSV_COL.index('before_gc_live_objects')
+ALLOCATION_SIZE = CSV_COL.index('allocation_size')
+PHASES = CSV_COL.index('phases')
+PARALLEL_WORKERS = CSV_COL.index('parallel_workers')
+YOUNG_GEN_SUMMARY = CSV_COL.index('young_gen_live_objects')
+OLD_GEN_SUMMARY = CSV_COL.index('old_gen_live_objects')
+YOUNG_GEN_HEAP = CSV_COL.index('young_gen_heap_capacity')
+OLD_GEN_HEAP = CSV_COL.index('old_gen_heap_capacity')
+STRINGTABLE_INFO = CSV_COL.index('stringtable_size')
+PRUNE_POINTER_COUNT = CSV_COL.index('prune_nmethod_pointer_count')
+YOUNG_GEN_GC_TIME = CSV_COL.index('young_gen_gc_time')
+OLD_GEN_GC_TIME = CSV_COL.index('old_gen_gc_time')
+OTYRT = CSV_COL.index('otyrt_stripe_total')
+OTYRT_TIME = CSV_COL.index('otyrt_time')
+STRINGTABLE_TIME = CSV_COL.index('stringtable_time')
+PRUNE_TIME = CSV_COL.index('prune_nmethod_time')
+GC_TIME_CLEAN = CSV_COL.index('gc_time_clean')
+GC_TIME = CSV_COL.index('gc_time')
+
+# the prune time line of version 2 and 3 logs
+PRUNE_PRESTRS = {2: 'PruneScavenge,', 3: 'PruneScavengeTime,'}
+
+def prune_prestr(line: str):
+    # for logs of unknown version, the spelling is told from the line itself
+    return PRUNE_PRESTRS[3] if PRUNE_PRESTRS[3] in line else PRUNE_PRESTRS[2]
+
+class GCEventParser:
+    # the open event lives in a single list laid out like CSV_COL which is
+    # reused for every event, a finished event is handed out as a tuple.
+    # parses version 2 and 3 logs, they only differ in the prune time line.
+    # a `version` of None reads both spellings of it
+    __slots__ = ('old_format', 'prune_prestr', 'record', 'otyrt_seen', 'start_of_gc')
+
+    def __init__(self, old_format: bool = False, version: int = 3):
+        self.old_format = old_format
+        self.prune_prestr = PRUNE_PRESTRS.get(version)
+        self.record = list(DEFAULT_RECORD)
+        self.reset()
+
+    def reset(self):
+        self.record[:] = DEFAULT_RECORD
+        self.otyrt_seen = False
+        self.start_of_gc = False
+
+    def feed(self, line: str):
+        # returns the csv row once the line closes the open GC event
+        # [YoungGen size, capacity=1388314624B used=1372782672B free=1000B]
+
+        if not self.start_of_gc:
+            if 'GC Start' not in line:
+                return None
+            self.start_of_gc = True
+            self.record[GC_ID] = parse_gc_id(line, 'GC Start id=')
+
+        match = LINE_REGEX.search(line)
+        if match is None:
+            return None
+        return self.line_handlers[first_marker(match, LINE_EARLIER, line)](self, line)
+
+    def on_gc_finish(self, line: str):
+        end_gc_id = parse_gc_id(line, 'GC Finish id=')
+        if end_gc_id == self.record[GC_ID]:
+            row = self.row()
+            self.reset()
+            return row
+
+    def on_gc_time(self, line: str):
+        self.record[GC_TIME] = parse_trace_time(line, 'GC Time')
+
+    def on_old_gen_time(self, line: str):
+        self.record[OLD_GEN_GC_TIME] = parse_gc_time(line, 'OldGenTime')
+
+    def on_young_gen_time(self, line: str):
+        self.record[YOUNG_GEN_GC_TIME] = parse_gc_time(line, 'YoungGenTime')
+
+    def on_allocation_size(self, line: str):
+        self.record[ALLOCATION_SIZE] = parse_allocation_size(line)
+
+    def on_phases(self, line: str):
+        self.record[PHASES] = parse_phases(line)
+
+    def on_parallel_workers(self, line: str):
+        self.record[PARALLEL_WORKERS] = parse_number(line, 'GCParallelWorkers')
+
+    def on_stringtable_time(self, line: str):
+        self.record[STRINGTABLE_TIME] = parse_trace_time(line, 'StringTableTime],' if self.old_format else 'StringTableTime,')
+
+    def on_stringtable_info(self, line: str):
+        info = parse_stringtable_info(line)
+        self.record[STRINGTABLE_INFO:STRINGTABLE_INFO + 3] = [info[key] for key in STRINGTABLE_KEYS]
+
+    def on_young_gen_summary(self, line: str):
+        summary = parse_key_values(line, SUMMARY_SCHEMA)
+        self.record[YOUNG_GEN_SUMMARY:YOUNG_GEN_SUMMARY + 4] = [summary[key] for key in SUMMARY_KEYS]
+
+    def on_old_gen_summary(self, line: str):
+        summary = parse_key_values(line, SUMMARY_SCHEMA)
+        self.record[OLD_GEN_SUMMARY:OLD_GEN_SUMMARY + 4] = [summary[key] for key in SUMMARY_KEYS]
+
+    def on_old_to_young_roots_task(self, line: str):
+        new_old_to_young_roots_task = parse_key_values(line, SUMMARY_SCHEMA)
+        # keep the stripe that took the longest
+        if not self.otyrt_seen or self.record[OTYRT_TIME] < new_old_to_young_roots_task['elapsed']:
+            self.otyrt_seen = True
+            self.record[OTYRT:OTYRT + 11] = [new_old_to_young_roots_task[key] for key in OTYRT_KEYS]
+            self.record[OTYRT_TIME] = new_old_to_young_roots_task['elapsed']
+
+    def on_young_gen_heap(self, line: str):
+        heap = parse_heap(line)
+        self.record[YOUNG_GEN_HEAP:YOUNG_GEN_HEAP + 3] = [heap[key] for key in HEAP_KEYS]
+
+    def on_old_gen_heap(self, line: str):
+        heap = parse_heap(line)
+        self.record[OLD_GEN_HEAP:OLD_GEN_HEAP + 3] = [heap[key] for key in HEAP_KEYS]
+
+    def on_prune_pointer_count(self, line: str):
+        self.record[PRUNE_POINTER_COUNT] = parse_number(line, 'PruneScavengeRootNmethods')
+
+    def on_prune_time(self, line: str):
+        self.record[PRUNE_TIME] = parse_trace_time(line, self.prune_prestr or prune_prestr(line))
+
+    def row(self):
+        record = self.record
+        record[GC_TIME_CLEAN] = record[GC_TIME] - record[STRINGTABLE_TIME] - record[PRUNE_TIME] - record[OTYRT_TIME]
+        return tuple(record)
+
+class SummaryEventParser:
+    # version 1 logs, an event runs from the BeforeGC to the AfterGC summary.
+    # like parse_v1 did, heap, GC Time and summary lines between two events
+    # still count and carry over into the next one, so these logs are never
+    # split between workers or resumed
+    __slots__ = ('old_format', 'record', 'started', 'before_gc_seen')
+
+    # no `GC Start` lines to skip ahead to, the scanner looks at every marker
+    start_of_gc = True
+
+    def __init__(self, old_format: bool = False):
+        self.old_format = old_format
+        self.record = list(DEFAULT_RECORD)
+        self.started = False
+        self.reset()
+
+    def reset(self):
+        self.record[:] = DEFAULT_RECORD
+        self.before_gc_seen = False
+
+    def feed(self, line: str):
+        match = SUMMARY_LINE_REGEX.search(line)
+        if match is None:
+            return None
+        return SUMMARY_LINE_HANDLERS[first_marker(match, SUMMARY_LINE_EARLIER, line)](self, line)
+
+    def on_summary(self, line: str):
+        # parse_v1 only took the lines starting with the marker
+        if not line.startswith('  summaries:'):
+            return None
+        if line.startswith('  summaries: context=OldGen'):
+            return self.on_old_gen_summary(line)
+        if line.startswith('  summaries: context=YoungGen'):
+            return self.on_young_gen_summary(line)
+        summary = parse_key_values(line, SUMMARY_SCHEMA)
+        if summary['context'] == 'AfterGC' and self.before_gc_seen:
+            self.started = False
+            row = self.row()
+            self.reset()
+            return row
+        if summary['context'] == 'BeforeGC':
+            self.started = True
+            self.before_gc_seen = True
+            self.record[GC_ID] = int(summary['gc_id'])
+            self.record[BEFORE_GC_SUMMARY:BEFORE_GC_SUMMARY + 4] = [summary[key] for key in SUMMARY_KEYS]
+
+    def on_young_gen_summary(self, line: str):
+        summary = parse_key_values(line, SUMMARY_SCHEMA)
+        self.record[YOUNG_GEN_SUMMARY:YOUNG_GEN_SUMMARY + 4] = [summary[key] for key in SUMMARY_KEYS]
+
+    def on_old_gen_summary(self, line: str):
+        summary = parse_key_values(line, SUMMARY_SCHEMA)
+        self.record[OLD_GEN_SUMMARY:OLD_GEN_SUMMARY + 4] = [summary[key] for key in SUMMARY_KEYS]
+
+    def on_young_gen_heap(self, line: str):
+        if line.startswith(' PSYoungGen'):
+            self.record[YOUNG_GEN_HEAP:YOUNG_GEN_HEAP + 2] = parse_heap_size(line)
+
+    def on_old_gen_heap(self, line: str):
+        if line.startswith(' ParOldGen'):
+            self.record[OLD_GEN_HEAP:OLD_GEN_HEAP + 2] = parse_heap_size(line)
+
+    def on_gc_time(self, line: str):
+        self.record[GC_TIME] = parse_gc_time(line)
+
+    def on_old_gen_time(self, line: str):
+        if self.started:
+            self.record[OLD_GEN_GC_TIME] = parse_gc_time(line, 'OldGenTime')
+
+    def on_young_gen_time(self, line: str):
+        if self.started:
+            self.record[YOUNG_GEN_GC_TIME] = parse_gc_time(line, 'YoungGenTime')
+
+    def on_allocation_size(self, line: str):
+        if self.started:
+            self.record[ALLOCATION_SIZE] = parse_allocation_size(line)
+
+    def on_stringtable_time(self, line: str):
+        if self.started:
+            self.record[STRINGTABLE_TIME] = parse_trace_time(line, 'StringTableTime],' if self.old_format else 'StringTableTime,')
+
+    def on_stringtable_info(self, line: str):
+        if self.started:
+            info = parse_stringtable_info(line)
+            self.record[STRINGTABLE_INFO:STRINGTABLE_INFO + 3] = [info[key] for key in STRINGTABLE_KEYS]
+
+    row = GCEventParser.row
+
+# one marker per line kind, in the precedence of the old `elif` chain.
+# the alternation below tries them in this order at every position, so
+# `PruneScavengeRootNmethods` still wins over `PruneScavenge`. across
+# positions it finds the leftmost marker, `first_marker` restores the chain
+# order on the rare lines that hold several
+LINE_HANDLERS = {
+    'GC Finish': GCEventParser.on_gc_finish,
+    'GC Time': GCEventParser.on_gc_time,
+    'OldGenTime': GCEventParser.on_old_gen_time,
+    'YoungGenTime': GCEventParser.on_young_gen_time,
+    'Mem allocate size': GCEventParser.on_allocation_size,
+    'Phase gc_id': GCEventParser.on_phases,
+    'GCParallelWorkers': GCEventParser.on_parallel_workers,
+    'StringTableTime': GCEventParser.on_stringtable_time,
+    'StringTableInfo': GCEventParser.on_stringtable_info,
+    'TraceCountRootOopClosureContainer: context=YoungGen': GCEventParser.on_young_gen_summary,
+    'TraceCountRootOopClosureContainer: context=OldGen': GCEventParser.on_old_gen_summary,
+    'OldToYoungRootsTaskGeneralInfo': GCEventParser.on_old_to_young_roots_task,
+    'YoungGen size': GCEventParser.on_young_gen_heap,
+    'OldGen size': GCEventParser.on_old_gen_heap,
+    'PruneScavengeRootNmethods': GCEventParser.on_prune_pointer_count,
+    'PruneScavenge': GCEventParser.on_prune_time,
+}
+
+# no capture groups, they disable the literal prefix scan of `re`
+LINE_REGEX = re.compile('|'.join(re.escape(marker) for marker in LINE_HANDLERS))
+
+BYTES_LINE_REGEX = re.compile(LINE_REGEX.pattern.encode())
+BYTES_LINE_HANDLERS = {marker.encode(): handler for marker, handler in LINE_HANDLERS.items()}
+
+def earlier_markers(markers):
+    # for every marker the alternation of the markers the chain tried before
+    # it, None for the first one
+    markers = list(markers)
+    separator = b'|' if isinstance(markers[0], bytes) else '|'
+    return {marker: re.compile(separator.join(re.escape(earlier) for earlier in markers[:index]))
+            if index else None for index, marker in enumerate(markers)}
+
+def first_marker(match, earlier: dict, line, end: int = None):
+    # the marker the old chain would have picked for the line `match` was
+    # found in: only a marker it tried earlier can win, and only further right
+    marker = match.group()
+    start = match.start()
+    end = len(line) if end is None else end
+    while earlier[marker] is not None:
+        match = earlier[marker].search(line, start + 1, end)
+        if match is None:
+            break
+        marker, start = match.group(), match.start()
+    return marker
+
+LINE_EARLIER = earlier_markers(LINE_HANDLERS)
+BYTES_LINE_EARLIER = earlier_markers(BYTES_LINE_HANDLERS)
+
+# the markers with a leading space only count at the start of the line, the
+# handlers check that. anchoring them with `^` here would make every search
+# several times slower
+SUMMARY_LINE_HANDLERS = {
+    '  summaries:': SummaryEventParser.on_summary,
+    ' PSYoungGen': SummaryEventParser.on_young_gen_heap,
+    ' ParOldGen': SummaryEventParser.on_old_gen_heap,
+    'GC Time': SummaryEventParser.on_gc_time,
+    'OldGenTime': SummaryEventParser.on_old_gen_time,
+    'YoungGenTime': SummaryEventParser.on_young_gen_time,
+    'Mem allocate size': SummaryEventParser.on_allocation_size,
+    'StringTableTime': SummaryEventParser.on_stringtable_time,
+    'StringTableInfo': SummaryEventParser.on_stringtable_info,
+}
+
+SUMMARY_LINE_REGEX = re.compile('|'.join(re.escape(marker) for marker in SUMMARY_LINE_HANDLERS))
+SUMMARY_LINE_EARLIER = earlier_markers(SUMMARY_LINE_HANDLERS)
+
+GCEventParser.bytes_line_regex = BYTES_LINE_REGEX
+GCEventParser.bytes_line_handlers = BYTES_LINE_HANDLERS
+GCEventParser.bytes_line_earlier = BYTES_LINE_EARLIER
+SummaryEventParser.bytes_line_regex = re.compile(SUMMARY_LINE_REGEX.pattern.encode())
+SummaryEventParser.bytes_line_handlers = {marker.encode(): handler for marker, handler in SUMMARY_LINE_HANDLERS.items()}
+SummaryEventParser.bytes_line_earlier = earlier_markers(SummaryEventParser.bytes_line_handlers)
+
+GCEventParser.line_handlers = LINE_HANDLERS
+
+# how BulkConverter turns the tokens of a column into values: like
+# convert_time, convert_size, to_number or int
+BULK_COLUMNS = {
+    'allocation_size': 'size',
+    'parallel_workers': 'int',
+    'young_gen_live_objects': 'number',
+    'young_gen_dead_objects': 'number',
+    'young_gen_total_objects': 'number',
+    'young_gen_roots_walk_elapsed': 'time',
+    'old_gen_live_objects': 'number',
+    'old_gen_dead_objects': 'number',
+    'old_gen_total_objects': 'number',
+    'old_gen_roots_walk_elapsed': 'time',
+    'young_gen_heap_capacity': 'size',
+    'young_gen_heap_used': 'size',
+    'young_gen_heap_free': 'size',
+    'old_gen_heap_capacity': 'size',
+    'old_gen_heap_used': 'size',
+    'old_gen_heap_free': 'size',
+    'stringtable_size': 'number',
+    'stringtable_processed': 'number',
+    'stringtable_removed': 'number',
+    'prune_nmethod_pointer_count': 'int',
+    'young_gen_gc_time': 'time',
+    'old_gen_gc_time': 'time',
+    **{'otyrt_{}'.format(key): 'number' for key in OTYRT_KEYS},
+    'stringtable_time': 'time',
+    'prune_nmethod_time': 'time',
+    'gc_time': 'time',
+}
+
+BULK_CONVERTERS = {'time': convert_time, 'size': convert_size, 'number': to_number, 'int': int}
+
+# stand-ins for missing tokens while a column is converted
+BULK_FILLERS = {'time': '0ms', 'size': '0K', 'number': '0', 'int': '0'}
+
+BULK_KINDS = {
+    kind: [CSV_COL.index(column) for column, column_kind in BULK_COLUMNS.items() if column_kind == kind]
+    for kind in BULK_CONVERTERS
+}
+
+# value tokens never hold whitespace, so a blank marks a column the event had no line for
+MISSING_TOKEN = ' '
+
+BULK_RECORD = [MISSING_TOKEN if column in BULK_COLUMNS else value for column, value in zip(CSV_COL, DEFAULT_RECORD)]
+
+class BulkGCEventParser(GCEventParser):
+    # GCEventParser that leaves the values as the tokens of the log, a
+    # BulkConverter in front of the writer converts a whole batch of rows
+    # at once. gc_id and otyrt_time are still converted, the parser needs
+    # them to match events and pick the slowest stripe
+    __slots__ = ()
+
+    def reset(self):
+        self.record[:] = BULK_RECORD
+        self.otyrt_seen = False
+        self.start_of_gc = False
+
+    def on_gc_time(self, line: str):
+        self.record[GC_TIME] = trace_time_token(line, 'GC Time')
+
+    def on_old_gen_time(self, line: str):
+        self.record[OLD_GEN_GC_TIME] = gc_time_token(line, 'OldGenTime')
+
+    def on_young_gen_time(self, line: str):
+        self.record[YOUNG_GEN_GC_TIME] = gc_time_token(line, 'YoungGenTime')
+
+    def on_allocation_size(self, line: str):
+        self.record[ALLOCATION_SIZE] = allocation_size_token(line)
+
+    def on_parallel_workers(self, line: str):
+        self.record[PARALLEL_WORKERS] = number_token(line, 'GCParallelWorkers')
+
+    def on_stringtable_time(self, line: str):
+        self.record[STRINGTABLE_TIME] = trace_time_token(line, 'StringTableTime],' if self.old_format else 'StringTableTime,')
+
+    def on_stringtable_info(self, line: str):
+        info = dict(key_value_pairs(line))
+        self.record[STRINGTABLE_INFO:STRINGTABLE_INFO + 3] = [info[key] for key in STRINGTABLE_KEYS]
+
+    def on_young_gen_summary(self, line: str):
+        summary = dict(key_value_pairs(line))
+        self.record[YOUNG_GEN_SUMMARY:YOUNG_GEN_SUMMARY + 4] = [summary[key] for key in SUMMARY_KEYS]
+
+    def on_old_gen_summary(self, line: str):
+        summary = dict(key_value_pairs(line))
+        self.record[OLD_GEN_SUMMARY:OLD_GEN_SUMMARY + 4] = [summary[key] for key in SUMMARY_KEYS]
+
+    def on_old_to_young_roots_task(self, line: str):
+        new_old_to_young_roots_task = dict(key_value_pairs(line))
+        elapsed = convert_time(new_old_to_young_roots_task['elapsed'])
+        # keep the stripe that took the longest
+        if not self.otyrt_seen or self.record[OTYRT_TIME] < elapsed:
+            self.otyrt_seen = True
+            self.record[OTYRT:OTYRT + 11] = [new_old_to_young_roots_task[key] for key in OTYRT_KEYS]
+            self.record[OTYRT_TIME] = elapsed
+
+    def on_young_gen_heap(self, line: str):
+        heap = dict(key_value_pairs(line))
+        self.record[YOUNG_GEN_HEAP:YOUNG_GEN_HEAP + 3] = [heap[key] for key in HEAP_KEYS]
+
+    def on_old_gen_heap(self, line: str):
+        heap = dict(key_value_pairs(line))
+        self.record[OLD_GEN_HEAP:OLD_GEN_HEAP + 3] = [heap[key] for key in HEAP_KEYS]
+
+    def on_prune_pointer_count(self, line: str):
+        self.record[PRUNE_POINTER_COUNT] = number_token(line, 'PruneScavengeRootNmethods')
+
+    def on_prune_time(self, line: str):
+        self.record[PRUNE_TIME] = trace_time_token(line, self.prune_prestr or prune_prestr(line))
+
+    def row(self):
+        # gc_time_clean is left to BulkConverter
+        return tuple(self.record)
+
+BulkGCEventParser.line_handlers = {
+    marker: getattr(BulkGCEventParser, handler.__name__) for marker, handler in LINE_HANDLERS.items()
+}
+BulkGCEventParser.bytes_line_handlers = {
+    marker.encode(): handler for marker, handler in BulkGCEventParser.line_handlers.items()
+}
+
+def token_buffer(tokens):
+    # the tokens as one writable ascii buffer, one line each, and where each starts and ends
+    import numpy as np
+    buffer = np.frombuffer(bytearray(('\n'.join(tokens) + '\n').encode()), dtype=np.uint8)
+    ends = np.flatnonzero(buffer == 0x0a)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    return buffer, starts, ends
+
+def char_at(buffer, positions, starts):
+    # NUL for positions in front of their token
+    import numpy as np
+    return np.where(positions >= starts, buffer[np.maximum(positions, 0)], 0)
+
+def read_floats(tokens):
+    # float() of every token in one pass, NaN where it fails
+    import numpy as np
+    try:
+        return np.array(list(map(float, tokens)))
+    except ValueError:
+        return np.array([to_float(token) for token in tokens])
+
+def round3(values):
+    # np.round only strays from round() right next to a tie or once values * 1000
+    # runs out of precision, those few go through round()
+    import numpy as np
+    scaled = values * 1000.0
+    rounded = np.rint(scaled) / 1000.0
+    with np.errstate(invalid='ignore'):
+        odd = (np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6) | (np.abs(values) >= 1e12)
+    for i in np.flatnonzero(odd):
+        rounded[i] = round(float(values[i]), 3)
+    return rounded
+
+def convert_tokens(kind: str, tokens):
+    # BULK_CONVERTERS[kind] over a list of tokens. unit suffixes are found
+    # and blanked out in one buffer that is parsed in a single pass, then
+    # scaled and rounded as arrays. returns the values and the tokens that
+    # have to go through the scalar converter instead
+    import numpy as np
+    if kind == 'int':
+        try:
+            return np.array(list(map(int, tokens)), dtype=np.int64), np.zeros(len(tokens), dtype=bool)
+        except (ValueError, OverflowError):
+            return np.zeros(len(tokens), dtype=np.int64), np.ones(len(tokens), dtype=bool)
+    if kind == 'number':
+        values = read_floats(tokens)
+        return values, np.isnan(values)
+
+    buffer, starts, ends = token_buffer(tokens)
+    last = char_at(buffer, ends - 1, starts)
+    if kind == 'time':
+        s_before = np.concatenate(([0], np.cumsum(buffer == 0x73)))
+        has_s = s_before[ends] > s_before[starts]
+        ms = (last == 0x73) & (char_at(buffer, ends - 2, starts) == 0x6d)
+        s = ~ms & (last == 0x73)
+        buffer[ends[ms | s] - 1] = 0x20
+        buffer[ends[ms] - 2] = 0x20
+        values = read_floats(buffer.tobytes().split(b'\n')[:-1])
+        # without an `s` convert_time gives 0 whatever the token
+        scalar = has_s & (np.isnan(values) | ~(ms | s))
+        return round3(np.where(s, values * 1000, np.where(ms, values * 1, 0.0))), scalar
+
+    filled = ends > starts
+    buffer[ends[filled] - 1] = 0x20
+    values = read_floats(buffer.tobytes().split(b'\n')[:-1])
+    values = np.where(last == 0x4b, values * 1.0, np.where(last == 0x42, values / 1000.0, values))
+    return round3(values), np.isnan(values) | ~filled
+
+class BulkConverter:
+    # csv.writer look-alike in front of another writer, converts the token
+    # rows of a BulkGCEventParser a batch at a time, column by column
+    def __init__(self, writer):
+        self.writer = writer
+
+    def writerow(self, row):
+        self.writerows([row])
+
+    def writerows(self, rows):
+        import numpy as np
+        columns = list(zip(*rows))
+        if not columns:
+            return
+        count = len(columns[0])
+        for kind, kind_indexes in BULK_KINDS.items():
+            # every column of a kind goes through convert_tokens at once
+            indexes = []
+            tokens = []
+            defaults = []
+            for index in kind_indexes:
+                column = columns[index]
+                missing = column.count(MISSING_TOKEN)
+                if missing == count:
+                    columns[index] = [DEFAULT_RECORD[index]] * count
+                    continue
+                if missing:
+                    defaults.extend((len(tokens) + position, DEFAULT_RECORD[index])
+                                    for position, token in enumerate(column) if token == MISSING_TOKEN)
+                indexes.append(index)
+                tokens.extend(column)
+            if not indexes:
+                continue
+            for position, _ in defaults:
+                tokens[position] = BULK_FILLERS[kind]
+            values, scalar = convert_tokens(kind, tokens)
+            values = values.tolist()
+            # tokens the vector path can not read, convert_time and friends decide
+            for position in np.flatnonzero(scalar).tolist():
+                values[position] = BULK_CONVERTERS[kind](tokens[position])
+            for position, default in defaults:
+                values[position] = default
+            for column, index in enumerate(indexes):
+                columns[index] = values[column * count:(column + 1) * count]
+        gc_time_clean = (
+            np.array(columns[GC_TIME], dtype=np.float64) - np.array(columns[STRINGTABLE_TIME], dtype=np.float64)
+            - np.array(columns[PRUNE_TIME], dtype=np.float64) - np.array(columns[OTYRT_TIME], dtype=np.float64)
+        )
+        columns[GC_TIME_CLEAN] = gc_time_clean.tolist()
+        self.writer.writerows(zip(*columns))
+
+def make_parser(version: int = 3, old_format: bool = False, bulk: bool = False):
+    # version 1 events carry values over, they are always converted right away
+    if version == 1:
+        return SummaryEventParser(old_format)
+    if bulk:
+        return BulkGCEventParser(old_format, version)
+    return GCEventParser(old_format, version)
+
+def parser_writer(parser, writer):
+    # the writer the scanner hands the rows of `parser` to
+    return BulkConverter(writer) if isinstance(parser, BulkGCEventParser) else writer
+
+def classify_line(line: str):
+    match = LINE_REGEX.search(line)
+    if match is None:
+        return None
+    return first_marker(match, LINE_EARLIER, line)
+
+def split_chunks(filename, chunks: int, start: int = 0):
+    # chunk boundaries always sit at the beginning of a `GC Start` line
+    size = os.path.getsize(filename)
+    offsets = [start]
+    with open(filename, 'rb') as log_file:
+        for index in range(1, chunks):
+            log_file.seek(max(start + (size - start) * index // chunks, offsets[-1]))
+            log_file.readline()
+            offset = log_file.tell()
             line = log_file.readline()
+            while line and b'GC Start' not in line:
+                offset += len(line)
+                line = log_file.readline()
+            if not line:
+                break
+            if offset > offsets[-1]:
+                offsets.append(offset)
+    offsets.append(max(size, start))
+    return list(zip(offsets[:-1], offsets[1:]))
+
+def detect_compression(filename):
+    with open(filename, 'rb') as log_file:
+        head = log_file.read(max(len(magic) for magic in COMPRESSION_MAGIC))
+    for magic, compression in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+def open_decompressed(filename, compression: str):
+    if compression == 'gzip':
+        return gzip.open(filename, 'rb')
+    if compression == 'xz':
+        return lzma.open(filename, 'rb')
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError('{} is zstd compressed, install the zstandard package to parse it'.format(filename))
+    return zstandard.ZstdDecompressor().stream_reader(open(filename, 'rb'), closefd=True)
+
+def detect_format(filename, compression: str = None):
+    # returns the log version (the parse_vN that used to read it) and whether
+    # it spells `StringTableTime],`. the version is None when the head shows
+    # neither prune time spelling, the parser then reads both. set `version`
+    # in the config for logs whose markers only show up later
+    try:
+        if compression is None:
+            with open(filename, 'rb') as log_file:
+                head = log_file.read(SNIFF_SIZE)
+        else:
+            with open_decompressed(filename, compression) as stream:
+                head = stream.read(SNIFF_SIZE)
+    except FileNotFoundError:
+        head = b''
+    if b'  summaries: context=BeforeGC' in head:
+        version = 1
+    elif PRUNE_PRESTRS[2].encode() in head:
+        version = 2
+    elif PRUNE_PRESTRS[3].encode() in head:
+        version = 3
+    else:
+        version = None
+    return version, b'StringTableTime],' in head
+
+def read_blocks(stream, blocks: queue.Queue, block_size: int):
+    # decompression thread, zlib, lzma and zstd release the GIL while
+    # inflating so this overlaps with the parser
+    try:
+        while True:
+            block = stream.read(block_size)
+            blocks.put(block)
+            if not block:
+                break
+    except Exception as error:
+        blocks.put(error)
+
+def decompressed_blocks(filename, compression: str, block_size: int = DECOMPRESS_BLOCK_SIZE):
+    # yields blocks that end on a line boundary. the queue is bounded so a
+    # slow parser holds back the decompressor
+    blocks = queue.Queue(DECOMPRESS_PREFETCH)
+    with open_decompressed(filename, compression) as stream:
+        reader = threading.Thread(target=read_blocks, args=(stream, blocks, block_size), daemon=True)
+        reader.start()
+        partial = b''
+        while True:
+            block = blocks.get()
+            if isinstance(block, Exception):
+                raise block
+            if not block:
+                break
+            block = partial + block
+            newline = block.rfind(b'\n') + 1
+            partial = block[newline:]
+            if newline > 0:
+                yield block[:newline]
+        if partial:
+            yield partial
+
+def log_blocks(filename, start: int = 0, block_size: int = PIPELINE_BLOCK_SIZE):
+    # reader stage of --pipeline, yields the log from `start` in blocks read
+    # ahead by a thread. a block ends right before its last `GC Start` line,
+    # or on a line boundary when one event outgrows it
+    blocks = queue.Queue(PIPELINE_PREFETCH)
+    with open(filename, 'rb') as log_file:
+        log_file.seek(start)
+        reader = threading.Thread(target=read_blocks, args=(log_file, blocks, block_size), daemon=True)
+        reader.start()
+        partial = b''
+        while True:
+            block = blocks.get()
+            if isinstance(block, Exception):
+                raise block
+            if not block:
+                break
+            block = partial + block
+            marker = block.rfind(b'GC Start')
+            cut = block.rfind(b'\n', 0, marker) + 1 if marker > 0 else 0
+            if cut == 0:
+                cut = block.rfind(b'\n') + 1
+            partial = block[cut:]
+            if cut > 0:
+                yield block[:cut]
+        if partial:
+            yield partial
+
+class PipelinedWriter:
+    # writer stage of --pipeline, the row batches of the scanner cross a
+    # bounded queue to a thread that converts, writes and flushes them
+    def __init__(self, writer, flush = None, depth: int = PIPELINE_ROW_BATCHES):
+        self.writer = writer
+        self.flush = flush
+        self.batches = queue.Queue(depth)
+        self.error = None
+        self.thread = threading.Thread(target=self.write_batches, daemon=True)
+
+    def write_batches(self):
+        while True:
+            rows = self.batches.get()
+            if rows is None:
+                return
+            if self.error is not None:
+                # keep draining so the scanner never blocks on a full queue
+                continue
+            try:
+                self.writer.writerows(rows)
+                if self.flush is not None:
+                    self.flush()
+            except Exception as error:
+                self.error = error
+
+    def writerow(self, row):
+        self.writerows([row])
+
+    def writerows(self, rows):
+        if self.error is not None:
+            raise self.error
+        # the scanner reuses its batch list
+        self.batches.put(list(rows))
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, error_type, error, error_traceback):
+        self.batches.put(None)
+        self.thread.join()
+        if error_type is None and self.error is not None:
+            raise self.error
+
+def line_start_after(log_map, offset: int):
+    # first line boundary at or after `offset`
+    if offset <= 0 or offset >= len(log_map) or log_map[offset - 1] == 0x0a:
+        return min(offset, len(log_map))
+    newline = log_map.find(b'\n', offset)
+    return len(log_map) if newline < 0 else newline + 1
+
+def count_newlines(log_map, start: int, end: int):
+    # an mmap has no count(), a block is copied out at a time instead
+    return sum(log_map[offset:min(offset + DECOMPRESS_BLOCK_SIZE, end)].count(b'\n')
+               for offset in range(start, end, DECOMPRESS_BLOCK_SIZE))
+
+def scan_lines(log_map, writer, parser: GCEventParser, start: int = 0, end: float = math.inf, index: list = None,
+               profile = None):
+    # feeds a memory mapped log (or any bytes) that begins at offset `start`
+    # to the parser and keeps reading past `end` until the open GC event is
+    # closed. returns the offset it stopped at, and the end offset and gc_id
+    # of the last finished event (None if there was none). a `ParseProfile`
+    # passed as `profile` counts the lines and events scanned.
+    # the log is never walked line by line: between events the scanner jumps straight to the next `GC Start`, inside
+    # an event the marker regex runs on the raw bytes and jumps to the next
+    # line the parser cares about. only those lines are ever decoded.
+    # `index` collects (gc_id, start, end) of every finished event
+    size = len(log_map)
+    offset = start
+    event_end = None
+    event_start = None
+    gc_id = None
+    events = 0
+    rows = []
+    while offset < size:
+        if not parser.start_of_gc:
+            if offset >= end:
+                break
+            marker = log_map.find(b'GC Start', offset)
+            if marker < 0:
+                offset = line_start_after(log_map, min(end, size))
+                break
+            line_start = max(log_map.rfind(b'\n', offset, marker) + 1, offset)
+            if line_start >= end:
+                offset = line_start_after(log_map, end)
+                break
+            match = None
+            event_start = line_start
+        else:
+            match = parser.bytes_line_regex.search(log_map, offset)
+            if match is None:
+                # the open event never finishes
+                offset = size
+                break
+            marker = match.start()
+            line_start = max(log_map.rfind(b'\n', offset, marker) + 1, offset)
+        newline = log_map.find(b'\n', marker)
+        offset = size if newline < 0 else newline + 1
+        if match is None:
+            handler = None
+        else:
+            key = match.group()
+            earlier = parser.bytes_line_earlier[key]
+            if earlier is not None and earlier.search(log_map, marker + 1, offset) is not None:
+                key = first_marker(match, parser.bytes_line_earlier, log_map, offset)
+            handler = parser.bytes_line_handlers[key]
+        line = log_map[line_start:offset].decode()
+        row = parser.feed(line) if handler is None else handler(parser, line)
+        if row is not None:
+            rows.append(row)
+            if len(rows) >= ROW_BATCH_SIZE:
+                writer.writerows(rows)
+                rows.clear()
+            event_end = offset
+            gc_id = row[0]
+            events += 1
+            if index is not None:
+                index.append((gc_id, event_start, event_end))
+    if rows:
+        writer.writerows(rows)
+    if profile is not None:
+        profile.lines += count_newlines(log_map, start, offset)
+        profile.events += events
+    return offset, event_end, gc_id
+
+def scan_blocks(blocks, writer, parser: GCEventParser, start: int = 0, index: list = None, profile = None):
+    # scan_lines over consecutive line aligned blocks that begin at offset
+    # `start`, the parser carries an open event from one block into the next
+    offset = start
+    event_end = None
+    event_start = None
+    gc_id = None
+    for block in blocks:
+        entries = None if index is None else []
+        carried = parser.start_of_gc
+        _, block_event_end, block_gc_id = scan_lines(block, writer, parser, index=entries, profile=profile)
+        if block_event_end is not None:
+            event_end, gc_id = offset + block_event_end, block_gc_id
+        if index is not None:
+            for entry_gc_id, entry_start, entry_end in entries:
+                # None for an event that began in an earlier block
+                entry_start = event_start if entry_start is None else offset + entry_start
+                index.append((entry_gc_id, entry_start, offset + entry_end))
+            if parser.start_of_gc and (entries or not carried):
+                # only the matching `GC Finish` closes an event, so the open
+                # one began at the first `GC Start` after the last closed one
+                after = entries[-1][2] if entries else 0
+                marker = block.find(b'GC Start', after)
+                event_start = offset + max(block.rfind(b'\n', after, marker) + 1, after)
+        offset += len(block)
+    return offset, event_end, gc_id
+
+def scan_log(filename, writer, parser: GCEventParser, start: int = 0, end: float = math.inf, index: list = None,
+             window: int = SCAN_WINDOW_SIZE, profile = None):
+    with open(filename, 'rb') as log_file:
+        size = os.fstat(log_file.fileno()).st_size
+        if size == 0:
+            # an empty file can not be mapped
+            return start, None, None
+        with mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as log_map:
+            offset = start
+            event_end = None
+            gc_id = None
+            while True:
+                # a window always ends between two events
+                offset, window_event_end, window_gc_id = scan_lines(
+                    log_map, writer, parser, offset, min(end, offset + window), index, profile)
+                if window_event_end is not None:
+                    event_end, gc_id = window_event_end, window_gc_id
+                if offset >= min(end, size):
+                    return offset, event_end, gc_id
+                # the scanner never looks behind `offset` again
+                log_map.madvise(mmap.MADV_DONTNEED, 0, offset - offset % mmap.PAGESIZE)
+
+class IndexBuffer(bytearray):
+    # index entries packed as they are written to the `.idx` file
+    def append(self, entry):
+        self.extend(INDEX_ENTRY.pack(*entry))
+
+def scan_rotated(logs, writer, parser: GCEventParser, pipeline: bool = False, profile = None):
+    # the logs of a rotated set one after the other as a single stream, the
+    # parser carries an event left open at the end of one log into the next
+    offset = 0
+    event_end = None
+    gc_id = None
+    for log in logs:
+        compression = detect_compression(log)
+        if compression is not None:
+            log_end, log_event_end, log_gc_id = scan_blocks(
+                decompressed_blocks(log, compression), writer, parser, profile=profile)
+        elif pipeline:
+            log_end, log_event_end, log_gc_id = scan_blocks(log_blocks(log), writer, parser, profile=profile)
+        else:
+            log_end, log_event_end, log_gc_id = scan_log(log, writer, parser, profile=profile)
+        if log_event_end is not None:
+            event_end, gc_id = offset + log_event_end, log_gc_id
+        offset += log_end
+    return offset, event_end, gc_id
+
+class IndexWriter:
+    # index entries packed straight into the `.idx` file
+    def __init__(self, index_file):
+        self.index_file = index_file
+
+    def append(self, entry):
+        self.index_file.write(INDEX_ENTRY.pack(*entry))
+
+class RowBuffer(list):
+    writerow = list.append
+    writerows = list.extend
+
+def parse_chunk(filename, start: int, end: int, old_format: bool = False, columnar: bool = False, version: int = 3,
+                index: bool = False, bulk: bool = False, parser = None):
+    # the returned offset tells where the next chunk has to pick up from.
+    # rows come back as csv text, or as a list for the columnar writer, and
+    # the index entries of the chunk packed as in the `.idx` file. the parser
+    # comes back too when the log ended inside an event, and may be passed in
+    # to go on with that event in the next log of a rotated set
+    rows = RowBuffer() if columnar else io.StringIO()
+    entries = IndexBuffer() if index else None
+    if parser is None:
+        parser = make_parser(version, old_format, bulk)
+    offset, event_end, gc_id = scan_log(
+        filename, parser_writer(parser, rows if columnar else csv.writer(rows)), parser, start, end, entries)
+    open_parser = parser if parser.start_of_gc else None
+    return rows if columnar else rows.getvalue(), offset, event_end, gc_id, entries, open_parser
+
+def parse_parallel(filename, write, old_format: bool = False, workers: int = 1, start: int = 0,
+                   columnar: bool = False, version: int = 3, write_index = None, bulk: bool = False):
+    # `filename` may also be a rotated set, its logs are chunked one by one
+    # and only the event left open at the end of a log is carried over
+    logs = [filename] if isinstance(filename, str) else list(filename)
+    sizes = [os.path.getsize(log) - start if log == logs[0] else os.path.getsize(log) for log in logs]
+    total = max(sum(sizes), 1)
+    chunks = [
+        (log, chunk_start, chunk_end)
+        for log, size in zip(logs, sizes)
+        for chunk_start, chunk_end in split_chunks(
+            log, max(-(-workers * CHUNKS_PER_WORKER * size // total), -(-size // MAX_CHUNK_SIZE)),
+            start if log == logs[0] else 0)
+    ]
+    index = write_index is not None
+    event_end = None
+    gc_id = None
+    chunks = iter(chunks)
+    pending = collections.deque()
+    with multiprocessing.Pool(workers) as pool:
+        log = logs[0]
+        offset = start
+        open_parser = None
+        while True:
+            # at most workers * CHUNKS_PER_WORKER parsed chunks wait to be written
+            for chunk in itertools.islice(chunks, workers * CHUNKS_PER_WORKER - len(pending)):
+                task = (*chunk, old_format, columnar, version, index, bulk)
+                pending.append((*chunk, pool.apply_async(parse_chunk, task)))
+            if not pending:
+                break
+            chunk_log, chunk_start, chunk_end, result = pending.popleft()
+            result = result.get()
+            if chunk_log != log:
+                # first chunk of the next log of a rotated set
+                log = chunk_log
+                offset = 0
+                if open_parser is not None:
+                    rows, offset, _, _, _, open_parser = parse_chunk(
+                        log, 0, 0, old_format, columnar, version, index, bulk, open_parser)
+                    write(rows)
+            if chunk_start < offset:
+                # previous chunk had an unfinished event at its end and
+                # consumed the beginning of this one, redo the remainder
+                if offset >= chunk_end:
+                    continue
+                result = parse_chunk(log, offset, chunk_end, old_format, columnar, version, index, bulk)
+            rows, offset, chunk_event_end, chunk_gc_id, entries, open_parser = result
+            write(rows)
+            if index:
+                write_index(entries)
+            if chunk_event_end is not None:
+                event_end, gc_id = chunk_event_end, chunk_gc_id
+    return event_end, gc_id
+
+def npy_header(typecode: str, rows: int):
+    # fixed size .npy v1.0 header so it can be rewritten once the row count is known
+    descr = ('<' if sys.byteorder == 'little' else '>') + {'q': 'i8', 'i': 'i4', 'd': 'f8'}[typecode]
+    header = "{{'descr': '{}', 'fortran_order': False, 'shape': ({},), }}".format(descr, rows)
+    header = header.ljust(NPY_HEADER_SIZE - 10 - 1) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+def read_manifest(output):
+    with open(os.path.join(output, 'manifest.json')) as f:
+        return json.load(f)
+
+class ColumnarWriter:
+    # csv.writer look-alike writing one .npy file per column of CSV_COL and a
+    # manifest.json, rows are buffered and appended column by column in batches
+    def __init__(self, output, rows: int = 0, batch_size: int = COLUMNAR_BATCH_SIZE):
+        self.output = output
+        self.rows = rows
+        self.batch_size = batch_size
+        self.batch = []
+        self.typecodes = [COLUMN_TYPES.get(column, 'd') for column in CSV_COL]
+        self.categories = {}
+        os.makedirs(output, exist_ok=True)
+        if rows > 0:
+            # resuming, drop whatever was written after the checkpoint
+            self.categories = {
+                category: code for code, category in enumerate(read_manifest(output)['columns']['phases']['categories'])
+            }
+        self.files = []
+        for column, typecode in zip(CSV_COL, self.typecodes):
+            path = os.path.join(output, '{}.npy'.format(column))
+            column_file = open(path, 'r+b' if rows > 0 else 'wb')
+            column_file.truncate(NPY_HEADER_SIZE + rows * array.array(typecode).itemsize)
+            column_file.seek(0, os.SEEK_END)
+            self.files.append(column_file)
+
+    def writerow(self, row):
+        self.batch.append(row)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def category(self, value):
+        if value is None:
+            return -1
+        if value not in self.categories:
+            self.categories[value] = len(self.categories)
+        return self.categories[value]
+
+    def flush(self):
+        if not self.batch:
+            return
+        for index, (column, typecode, column_file) in enumerate(zip(CSV_COL, self.typecodes, self.files)):
+            values = [row[index] for row in self.batch]
+            if column == 'phases':
+                values = [self.category(value) for value in values]
+            try:
+                column_array = array.array(typecode, values)
+            except TypeError:
+                # parse_key_values keeps values it could not convert as str
+                column_array = array.array('d', [to_float(value) for value in values])
+            column_file.write(column_array.tobytes())
+        self.rows += len(self.batch)
+        self.batch = []
+
+    def close(self):
+        self.flush()
+        columns = {}
+        for column, typecode, column_file in zip(CSV_COL, self.typecodes, self.files):
+            column_file.seek(0)
+            column_file.write(npy_header(typecode, self.rows))
+            column_file.close()
+            columns[column] = {'file': '{}.npy'.format(column)}
+        columns['phases']['categories'] = list(self.categories)
+        with open(os.path.join(self.output, 'manifest.json'), 'w') as f:
+            json.dump({'rows': self.rows, 'columns': columns}, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+def output_size(output):
+    # bytes of a csv, rows of a columnar output
+    if os.path.isdir(output):
+        return read_manifest(output)['rows']
+    return os.path.getsize(output)
+
+def checkpoint_path(output):
+    return '{}.checkpoint.json'.format(output)
+
+def index_path(output):
+    return '{}.idx'.format(output)
+
+def index_size(output):
+    try:
+        return os.path.getsize(index_path(output))
+    except OSError:
+        return None
+
+def parser_version():
+    with open(__file__, 'rb') as source:
+        return hashlib.sha1(source.read()).hexdigest()
+
+def hash_log_prefix(filename, offset: int):
+    # the head and the bytes right before `offset` are enough to tell a
+    # rotated or truncated log apart without re-reading gigabytes
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as log_file:
+        digest.update(log_file.read(min(offset, CHECKPOINT_HASH_SIZE)))
+        tail = max(0, offset - CHECKPOINT_HASH_SIZE)
+        log_file.seek(tail)
+        digest.update(log_file.read(offset - tail))
+    return digest.hexdigest()
+
+def rotated_logs(filename):
+    # `filename` and the logs it was rolled over into, oldest first. logrotate
+    # shifts the numbers while the JVM cycles through them, so the order comes
+    # from the modification time and only ties go to the higher number
+    directory = os.path.dirname(filename)
+    base = os.path.basename(filename)
+    logs = []
+    for name in os.listdir(directory or '.'):
+        if name == base:
+            number = -1
+        elif name.startswith(base) and ROTATED_SUFFIX_REGEX.fullmatch(name, len(base)):
+            number = int(ROTATED_SUFFIX_REGEX.fullmatch(name, len(base)).group(1))
+        else:
+            continue
+        path = os.path.join(directory, name)
+        logs.append((os.stat(path).st_mtime_ns, -number, path))
+    if not logs:
+        raise FileNotFoundError('no log {} nor any rotated log of it'.format(filename))
+    return tuple(path for _, _, path in sorted(logs))
+
+def log_source(filename):
+    # what a store records about the log an output came from
+    if not isinstance(filename, str):
+        sources = [log_source(log) for log in filename]
+        return {
+            'log': [source['log'] for source in sources],
+            'size': sum(source['size'] for source in sources),
+            'hash': hashlib.sha1(''.join(source['hash'] for source in sources).encode()).hexdigest(),
+        }
+    size = os.path.getsize(filename)
+    return {'log': os.path.abspath(filename), 'size': size, 'hash': hash_log_prefix(filename, size)}
+
+def save_checkpoint(filename, output, old_format: bool, offset: int, gc_id, version: int = 3, index: bool = False):
+    checkpoint = {
+        'log': os.path.abspath(filename),
+        'version': version,
+        'old_format': old_format,
+        'parser': parser_version(),
+        'offset': offset,
+        'gc_id': gc_id,
+        'prefix_hash': hash_log_prefix(filename, offset),
+        'output_size': output_size(output),
+        'index_size': index_size(output) if index else None,
+    }
+    with open(checkpoint_path(output), 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+
+def load_checkpoint(filename, output, old_format: bool = False, version: int = 3, index: bool = False):
+    # returns None whenever the output has to be rebuilt from byte 0
+    try:
+        with open(checkpoint_path(output)) as f:
+            checkpoint = json.load(f)
+        if checkpoint['log'] != os.path.abspath(filename) or checkpoint['old_format'] != old_format:
+            return None
+        if checkpoint['version'] != version:
+            return None
+        if checkpoint['parser'] != parser_version():
+            return None
+        if os.path.getsize(filename) < checkpoint['offset'] or output_size(output) < checkpoint['output_size']:
+            return None
+        if hash_log_prefix(filename, checkpoint['offset']) != checkpoint['prefix_hash']:
+            return None
+        # an index asked for now but not kept last time needs the whole log
+        if index and (checkpoint['index_size'] is None or (index_size(output) or 0) < checkpoint['index_size']):
+            return None
+    except (OSError, ValueError, KeyError):
+        return None
+    return checkpoint
+
+# module level helpers --profile times
+PROFILED_HELPERS = [
+    'parse_gc_id',
+    'key_value_pairs',
+    'parse_key_values',
+    'parse_heap',
+    'parse_heap_size',
+    'gc_time_token',
+    'parse_gc_time',
+    'allocation_size_token',
+    'parse_allocation_size',
+    'parse_phases',
+    'trace_time_token',
+    'parse_trace_time',
+    'parse_stringtable_info',
+    'number_token',
+    'parse_number',
+    'convert_tokens',
+]
 
-            start_gc_id = -99
-            end_gc_id = -100
-
-            gc_time = 0.0
-            allocation_size = 0.0
-            phases = None
-            parallel_workers = 0
-
-            need_full_gc = 0
-
-            old_gen_summary = None
-            old_gen_gc_time = 0.0
-            old_gen_heap = None
-
-            young_gen_summary = None
-            young_gen_gc_time = 0.0
-            young_gen_heap = None
-
-            stringtable_time = 0.0
-            stringtable_info = None
-
-            prune_pointer_count = 0
-            prune_time = 0.0
-
-            post_scavenge_time = 0.0
-            after_post_scavenge_time = 0.0
-
-            old_to_young_roots_task = None
-
-            start_of_gc = False
-            end_of_gc = False
-
-            while line:
-                # [YoungGen size, capacity=1388314624B used=1372782672B free=1000B]
-
-                if not start_of_gc and 'GC Start' in line:
-                    start_of_gc = True
-                    end_of_gc = False
-                    start_gc_id = parse_gc_id(line, 'GC Start id=')
-
-                if start_of_gc and not end_of_gc:
-                    if 'GC Finish' in line:
-                        end_gc_id = parse_gc_id(line, 'GC Finish id=')
-                        if end_gc_id == start_gc_id:
-                            end_of_gc = True
-                            start_of_gc = False
-                    elif 'GC Time' in line:
-                        gc_time = parse_trace_time(line, 'GC Time')
-                    elif 'OldGenTime' in line:
-                        old_gen_gc_time = parse_gc_time(line, 'OldGenTime')
-                    elif 'YoungGenTime' in line:
-                        young_gen_gc_time = parse_gc_time(line, 'YoungGenTime')
-                    elif 'Mem allocate size' in line:
-                        allocation_size = parse_allocation_size(line)
-                    elif 'Phase gc_id' in line:
-                        phases = parse_phases(line)
-                    elif 'GCParallelWorkers' in line:
-                        parallel_workers = parse_number(line, 'GCParallelWorkers')
-                    elif 'StringTableTime' in line:
-                        stringtable_time = parse_trace_time(line, 'StringTableTime],' if old_format else 'StringTableTime,')
-                    elif 'StringTableInfo' in line:
-                        stringtable_info = parse_stringtable_info(line)
-                    elif 'TraceCountRootOopClosureContainer: context=YoungGen' in line:
-                        young_gen_summary = parse_line_summaries(line, 3)
-                    elif 'TraceCountRootOopClosureContainer: context=OldGen' in line:
-                        old_gen_summary = parse_line_summaries(line, 3)
-                    elif 'OldToYoungRootsTaskGeneralInfo' in line:
-                        iterate = 0
-                        success = False
-                        while not success:
-                            try:
-                                new_old_to_young_roots_task = parse_line_summaries(line, iterate)
-                                success = True
-                            except:
-                                iterate += 1
-
-                        if old_to_young_roots_task:
-                            # compare elapsed
-                            if old_to_young_roots_task['elapsed'] < new_old_to_young_roots_task['elapsed']:
-                                old_to_young_roots_task = new_old_to_young_roots_task
-                        else:
-                            old_to_young_roots_task = new_old_to_young_roots_task
-                    elif 'YoungGen size' in line:
-                        young_gen_heap = parse_heap(line)
-                    elif 'OldGen size' in line:
-                        old_gen_heap = parse_heap(line)
-                    elif 'PruneScavengeRootNmethods' in line:
-                        prune_pointer_count = parse_number(line, 'PruneScavengeRootNmethods')
-                    elif 'PruneScavenge' in line:
-                        prune_time = parse_trace_time(line, 'PruneScavengeTime,')
+def profile_path(output):
+    return '{}.profile.json'.format(output)
+
+class ParseProfile:
+    # what --profile records about one parse run: lines and time per line
+    # kind, cumulative time per parse_* helper (nested helpers count in
+    # both) and what became of the GC events
+    def __init__(self):
+        self.branches = {}
+        self.helpers = {}
+        self.lines = 0
+        self.events = 0
+        self.gc_starts = 0
+        self.unmatched_finishes = 0
+        # a copy of the module globals, with the helpers timed
+        self.namespace = dict(globals())
+        self.namespace.update({name: self.timed(self.helpers, name, self.rebind(globals()[name]))
+                               for name in PROFILED_HELPERS})
+
+    def timed(self, stats: dict, key: str, function):
+        counter = stats.setdefault(key, [0, 0.0])
+        def timed_function(*args, **kwargs):
+            start_time = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                counter[0] += 1
+                counter[1] += time.perf_counter() - start_time
+        return timed_function
+
+    def rebind(self, function):
+        # `function` with the timed helpers in place of the module level ones
+        rebound = types.FunctionType(function.__code__, self.namespace, function.__name__, function.__defaults__,
+                                     function.__closure__)
+        rebound.__kwdefaults__ = function.__kwdefaults__
+        return rebound
+
+    def profiled(self, instance, attributes: dict = None):
+        # turns `instance` into a subclass of its own class whose methods see
+        # the timed helpers. only this instance does, other parsers and
+        # threads keep calling the plain ones
+        instance_class = type(instance)
+        methods = {}
+        for base in reversed(instance_class.__mro__):
+            methods.update({name: self.rebind(value) for name, value in vars(base).items()
+                            if isinstance(value, types.FunctionType)})
+        methods.update(attributes or {})
+        methods['__slots__'] = ()
+        instance.__class__ = type('Profiled' + instance_class.__name__, (instance_class,), methods)
+        return instance
+
+    def wrap(self, parser):
+        # `profiled`, and every line dispatched through counting and timing handlers
+        profile = self
+        parser_class = type(parser)
+        handlers = {
+            marker.decode(): self.timed(self.branches, marker.decode(), self.rebind(handler))
+            for marker, handler in parser_class.bytes_line_handlers.items()
+        }
+        if 'GC Finish' in handlers:
+            on_gc_finish = handlers['GC Finish']
+            def counted_gc_finish(parser, line: str):
+                row = on_gc_finish(parser, line)
+                if row is None:
+                    profile.unmatched_finishes += 1
+                return row
+            handlers['GC Finish'] = counted_gc_finish
+        plain_feed = self.rebind(parser_class.feed)
+        timed_feed = self.timed(self.branches, 'GC Start', plain_feed)
+        def feed(parser, line: str):
+            if parser.start_of_gc or 'GC Start' not in line:
+                return plain_feed(parser, line)
+            profile.gc_starts += 1
+            return timed_feed(parser, line)
+        return self.profiled(parser, {
+            'feed': feed,
+            'line_handlers': handlers,
+            'bytes_line_handlers': {marker.encode(): handler for marker, handler in handlers.items()},
+        })
+
+    def report(self, elapsed: float, bytes_read: int):
+        classified = sum(count for count, _ in self.branches.values())
+        return {
+            'elapsed_seconds': elapsed,
+            'bytes_read': bytes_read,
+            'lines': {
+                'total': self.lines,
+                # noise, and lines of a kind the parser does not look at
+                'unclassified': self.lines - classified,
+                'branches': {
+                    marker: {'lines': count, 'seconds': seconds}
+                    for marker, (count, seconds) in sorted(self.branches.items(), key=lambda item: -item[1][1])
+                },
+            },
+            'helpers': {
+                name: {'calls': calls, 'seconds': seconds}
+                for name, (calls, seconds) in sorted(self.helpers.items(), key=lambda item: -item[1][1]) if calls
+            },
+            'events': {
+                'gc_starts': self.gc_starts,
+                'emitted': self.events,
+                # started but never closed by a `GC Finish` of the same id
+                'dropped': max(self.gc_starts - self.events, 0),
+                'unmatched_finishes': self.unmatched_finishes,
+            },
+        }
+
+def parse(filename, output, old_format: bool = None, workers: int = 1, resume: bool = False, output_format: str = 'csv',
+          index: bool = False, bulk: bool = False, profile: bool = False, pipeline: bool = False, version: int = None):
+    # with `resume` only the part of the log appended since the last run is
+    # parsed, as long as the checkpoint next to `output` still matches the log.
+    # compressed and version 1 logs are streamed once from the start, they can
+    # neither be split between workers nor resumed. `old_format` and `version`
+    # are taken from the log itself unless given. `index` also writes `<output>.idx` with the
+    # byte range of every GC event, see parse_range. `bulk` converts the
+    # values a batch of events at a time, the output stays the same.
+    # `profile` parses in a single process and writes `<output>.profile.json`.
+    # `pipeline` reads, scans and writes a single process parse in three
+    # threads connected by bounded queues. `filename` may also be a rotated
+    # set from rotated_logs, parsed from its oldest log on as one stream
+    logs = [filename] if isinstance(filename, str) else list(filename)
+    rotated = len(logs) > 1
+    filename = logs[0]
+    compressions = [detect_compression(log) for log in logs]
+    compression = compressions[0]
+    detected_version, detected_old_format = detect_format(filename, compression)
+    if old_format is None:
+        old_format = detected_old_format
+    if version is None:
+        version = detected_version
+    streamed = any(compression is not None for compression in compressions) or version == 1
+    # offsets into a decompressed stream can not be seeked to, and the logs
+    # of a rotated set are renamed under the offsets at the next rotation
+    index = index and not streamed and not rotated
+    resume = resume and not streamed and not rotated
+    checkpoint = load_checkpoint(filename, output, old_format, version, index) if resume else None
+    if checkpoint is None:
+        start, gc_id, size = 0, None, 0
+    else:
+        start, gc_id, size = checkpoint['offset'], checkpoint['gc_id'], checkpoint['output_size']
 
-                line = log_file.readline()
+    columnar = output_format == 'columnar'
+    if columnar:
+        output_file = writer = ColumnarWriter(output, size)
+        write = writer.writerows
+    else:
+        if checkpoint is not None:
+            os.truncate(output, size)
+        output_file = open(output, 'w' if checkpoint is None else 'a', newline='')
+        writer = csv.writer(output_file)
+        write = output_file.write
+        if checkpoint is None:
+            writer.writerow(CSV_COL)
 
-                if end_of_gc:
-                    end_of_gc = False
-                    if young_gen_summary is None:
-                        young_gen_summary = {
-                            'live_objects': 0,
-                            'dead_objects': 0,
-                            'total_objects': 0,
-                            'elapsed': 0.0,
-                        }
-                    if old_gen_summary is None:
-                        old_gen_summary = {
-                            'live_objects': 0.0,
-                            'dead_objects': 0.0,
-                            'total_objects': 0.0,
-                            'elapsed': 0.0,
-                        }
-                    if stringtable_info is None:
-                        stringtable_info = {
-                            'table_size': 0.0,
-                            'processed': 0.0,
-                            'removed': 0.0,
-                        }
-                    if young_gen_heap is None:
-                        young_gen_heap = {
-                            'capacity': 0.0,
-                            'used': 0.0,
-                            'free': 0.0,
-                        }
-                    if old_gen_heap is None:
-                        old_gen_heap = {
-                            'capacity': 0.0,
-                            'used': 0.0,
-                            'free': 0.0,
-                        }
-                    if old_to_young_roots_task is None:
-                        old_to_young_roots_task = {
-                            'elapsed': 0,
-                            'stripe_num': 0,
-                            'stripe_total': 0,
-                            'ssize': 0,
-                            'start_card': 0,
-                            'end_card': 0,
-                            'slice_width': 0,
-                            'distance': 0,
-                            'slice_counter': 0,
-                            'dirty_card_counter': 0,
-                            'objects_scanned_counter': 0,
-                            'card_increment_counter': 0,
-                            'total_max_card_pointer_being_walked_through': 0,
-                        }
-
-                    writer.writerow([
-                        start_gc_id,
-                        allocation_size,
-                        phases,
-                        parallel_workers,
-
-                        # Oops
-                        young_gen_summary['live_objects'],
-                        young_gen_summary['dead_objects'],
-                        young_gen_summary['total_objects'],
-                        young_gen_summary['elapsed'],
-
-                        old_gen_summary['live_objects'],
-                        old_gen_summary['dead_objects'],
-                        old_gen_summary['total_objects'],
-                        old_gen_summary['elapsed'],
-
-                        # Heap
-                        young_gen_heap['capacity'],
-                        young_gen_heap['used'],
-                        young_gen_heap['free'],
-
-                        old_gen_heap['capacity'],
-                        old_gen_heap['used'],
-                        old_gen_heap['free'],
-
-                        # Stringtable
-                        stringtable_info['table_size'],
-                        stringtable_info['processed'],
-                        stringtable_info['removed'],
-
-                        # Prune
-                        prune_pointer_count,
-
-                        # Gen time
-                        young_gen_gc_time,
-                        old_gen_gc_time,
-
-                        # old_to_young_roots_task
-                        old_to_young_roots_task['stripe_total'],
-                        old_to_young_roots_task['ssize'],
-                        old_to_young_roots_task['start_card'],
-                        old_to_young_roots_task['end_card'],
-                        old_to_young_roots_task['slice_width'],
-                        old_to_young_roots_task['distance'],
-                        old_to_young_roots_task['slice_counter'],
-                        old_to_young_roots_task['dirty_card_counter'],
-                        old_to_young_roots_task['objects_scanned_counter'],
-                        old_to_young_roots_task['card_increment_counter'],
-                        old_to_young_roots_task['total_max_card_pointer_being_walked_through'],
-
-                        # Time
-                        old_to_young_roots_task['elapsed'],
-                        stringtable_time,
-                        prune_time,
-                        gc_time - stringtable_time - prune_time - old_to_young_roots_task['elapsed'],
-                        gc_time,
-                    ])
-
-                    start_gc_id = -99
-                    end_gc_id = -100
-
-                    gc_time = 0.0
-                    allocation_size = 0.0
-                    phases = None
-                    parallel_workers = 0
-
-                    need_full_gc = 0
-
-                    old_gen_summary = None
-                    old_gen_gc_time = 0.0
-                    old_gen_heap = None
-
-                    young_gen_summary = None
-                    young_gen_gc_time = 0.0
-                    young_gen_heap = None
-
-                    stringtable_time = 0.0
-                    stringtable_info = None
-
-                    prune_pointer_count = 0
-                    prune_time = 0.0
-
-                    post_scavenge_time = 0.0
-                    after_post_scavenge_time = 0.0
-
-                    old_to_young_roots_task = None
-
-                    start_of_gc = False
-                    end_of_gc = False
-
-            csv_file.close()
-        log_file.close()
+    if index:
+        if checkpoint is not None:
+            os.truncate(index_path(output), checkpoint['index_size'])
+        index_file = open(index_path(output), 'wb' if checkpoint is None else 'ab')
+    else:
+        # a stale index would point at events of another run
+        if index_size(output) is not None:
+            os.remove(index_path(output))
+        index_file = io.BytesIO()
+
+    parser = make_parser(version, old_format, bulk)
+    profiler = ParseProfile() if profile else None
+    if profile:
+        # the timed helpers only exist in this process
+        parser = profiler.wrap(parser)
+        workers = 1
+    rows = parser_writer(parser, writer)
+    if profile and isinstance(rows, BulkConverter):
+        # the bulk parser leaves the conversion to its writer
+        rows = profiler.profiled(rows)
+    if pipeline:
+        rows = PipelinedWriter(rows, None if columnar else output_file.flush)
+    start_time = time.perf_counter()
+    with output_file, index_file, rows if pipeline else contextlib.nullcontext():
+        if workers > 1 and not streamed:
+            event_end, last_gc_id = parse_parallel(
+                logs if rotated else filename, write, old_format, workers, start, columnar, version,
+                index_file.write if index else None, bulk)
+        elif rotated:
+            offset, event_end, last_gc_id = scan_rotated(logs, rows, parser, pipeline, profiler)
+        elif compression is not None:
+            offset, event_end, last_gc_id = scan_blocks(
+                decompressed_blocks(filename, compression), rows, parser, profile=profiler)
+        else:
+            entries = IndexWriter(index_file) if index else None
+            if pipeline:
+                offset, event_end, last_gc_id = scan_blocks(
+                    log_blocks(filename, start), rows, parser, start, entries, profiler)
+            else:
+                offset, event_end, last_gc_id = scan_log(filename, rows, parser, start, index=entries, profile=profiler)
+
+    if profile:
+        report = profiler.report(time.perf_counter() - start_time, offset - start)
+        report.update({'log': [os.path.abspath(log) for log in logs] if rotated else os.path.abspath(filename),
+                       'version': version, 'old_format': old_format, 'compression': compression, 'bulk': bulk})
+        with open(profile_path(output), 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if streamed or rotated:
+        return
+    if event_end is not None:
+        start, gc_id = event_end, last_gc_id
+    save_checkpoint(filename, output, old_format, start, gc_id, version, index)
+
+def read_index(output):
+    import numpy as np
+    try:
+        return np.fromfile(index_path(output), dtype=INDEX_DTYPE)
+    except FileNotFoundError:
+        raise FileNotFoundError('no GC event index next to {}, parse with --index first'.format(output)) from None
+
+def check_event_start(filename, offset: int):
+    # an index of another log (or of an older copy of it) would point anywhere
+    with open(filename, 'rb') as log_file:
+        log_file.seek(max(0, offset - 1))
+        head = log_file.read(1) if offset > 0 else b'\n'
+        line = log_file.readline()
+    if head != b'\n' or b'GC Start' not in line:
+        raise ValueError('index of {} does not match the log at offset {}'.format(filename, offset))
+
+class GCRangeFilter:
+    # keeps the rows of a scanned span whose gc_id falls in [first, last]
+    def __init__(self, writer, first: int, last: int):
+        self.writer = writer
+        self.first = first
+        self.last = last
+
+    def writerows(self, rows):
+        self.writer.writerows(row for row in rows if self.first <= row[GC_ID] <= self.last)
+
+def parse_range(filename, output, range_output, gc_range = None, byte_range = None, old_format: bool = None,
+                output_format: str = 'csv', version: int = None):
+    # re-parses only the GC events with gc_id in [first, last] (`gc_range`) or
+    # starting in [start, end) (`byte_range`) into `range_output`, looked up in
+    # the index `parse(..., index=True)` wrote next to `output`
+    entries = read_index(output)
+    if gc_range is not None:
+        first, last = gc_range
+        selected = entries[(entries['gc_id'] >= first) & (entries['gc_id'] <= last)]
+    else:
+        first, last = byte_range
+        selected = entries[(entries['start'] >= first) & (entries['start'] < last)]
+
+    if output_format == 'columnar':
+        output_file = writer = ColumnarWriter(range_output, 0)
+    else:
+        output_file = open(range_output, 'w', newline='')
+        writer = csv.writer(output_file)
+        writer.writerow(CSV_COL)
+
+    with output_file:
+        if len(selected) == 0:
+            return 0
+        start, end = int(selected['start'].min()), int(selected['end'].max())
+        check_event_start(filename, start)
+        detected_version, detected_old_format = detect_format(filename)
+        if old_format is None:
+            old_format = detected_old_format
+        if version is None:
+            version = detected_version
+        # the span can hold events of other gc_ids once the JVM restarted
+        scan_log(filename, GCRangeFilter(writer, *gc_range) if gc_range is not None else writer,
+                 make_parser(version, old_format), start, end)
+    return len(selected)
+
+class LogFollower:
+    # tail -F for a growing log, survives rotation (new inode) and truncation.
+    # `start` is where to pick up in the log as it is now
+    def __init__(self, filename, block_size: int = FOLLOW_BLOCK_SIZE, start: int = 0):
+        self.filename = filename
+        self.block_size = block_size
+        self.start = start
+        self.log_file = None
+        self.inode = None
+        self.offset = 0
+        self.partial = b''
+
+    def reopen(self):
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+        try:
+            self.log_file = open(self.filename, 'rb')
+        except FileNotFoundError:
+            return False
+        self.inode = os.fstat(self.log_file.fileno()).st_ino
+        self.log_file.seek(self.start)
+        self.offset = self.start
+        self.start = 0
+        # an unfinished last line of the old file is never completed, it
+        # would be glued onto the first line of the new one
+        self.partial = b''
+        return True
+
+    def rotated(self):
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            # renamed away and not recreated yet, keep draining the old file
+            return False
+        if stat.st_ino != self.inode:
+            return True
+        if stat.st_size < self.offset:
+            # truncated in place (copytruncate), a line the writer was in
+            # the middle of went with the old content
+            self.log_file.seek(0)
+            self.offset = 0
+            self.partial = b''
+        return False
+
+    def read(self):
+        # returns the complete lines appended since the last call as one
+        # block, a line without its newline yet stays buffered until the
+        # writer finishes it
+        if self.log_file is None and not self.reopen():
+            return b''
+        data = self.log_file.read(self.block_size)
+        if not data:
+            if not self.rotated() or not self.reopen():
+                return b''
+            data = self.log_file.read(self.block_size)
+        self.offset += len(data)
+        data = self.partial + data
+        end = data.rfind(b'\n') + 1
+        self.partial = data[end:]
+        return data[:end]
+
+    def poll(self):
+        return [line.decode() + '\n' for line in self.read().split(b'\n')[:-1]]
+
+    def position(self):
+        # offset right after the last line handed out
+        position = self.offset - len(self.partial)
+        assert position >= 0, 'buffered line reaches before the start of {}'.format(self.filename)
+        return position
+
+    def close(self):
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+
+def follow(filename, output, old_format: bool = None, poll_interval: float = FOLLOW_POLL_INTERVAL, version: int = None):
+    # every GC event is written as soon as its `GC Finish` line shows up. the
+    # format is sniffed from what the log holds when following starts
+    follower = LogFollower(filename)
+    detected_version, detected_old_format = detect_format(filename)
+    parser = make_parser(detected_version if version is None else version,
+                         detected_old_format if old_format is None else old_format)
+    try:
+        with open(output, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(CSV_COL)
+            csv_file.flush()
+            while True:
+                lines = follower.poll()
+                if not lines:
+                    time.sleep(poll_interval)
+                    continue
+                rows = [row for row in map(parser.feed, lines) if row is not None]
+                if rows:
+                    writer.writerows(rows)
+                    csv_file.flush()
+    finally:
+        follower.close()
+
+def follow_entries(entries, poll_interval: float = FOLLOW_POLL_INTERVAL):
+    threads = []
+    for infile, outfile, old_format, version in entries:
+        thread = threading.Thread(target=follow, args=(infile, outfile, old_format, poll_interval, version), daemon=True)
+        thread.start()
+        threads.append(thread)
+    print('Following {} raw_data, press Ctrl+C to stop'.format(len(threads)))
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        print('Stopped following')
+
+class IngestedLog:
+    # one JVM of the ingest daemon: its follower, the parser holding its open
+    # event and the csv its rows are appended to. `version` overrides the sniffed one
+    def __init__(self, filename, output, version: int = None):
+        self.filename = filename
+        self.output = output
+        self.version = version
+        self.old_format = None
+        self.parser = None
+        self.follower = None
+        self.csv_file = None
+        self.writer = None
+        self.gc_id = None
+        self.checkpointed = time.monotonic()
+
+    def open(self):
+        # picks up where the previous run checkpointed, as long as it is still the same log
+        detected_version, self.old_format = detect_format(self.filename)
+        if self.version is None:
+            self.version = detected_version
+        checkpoint = load_checkpoint(self.filename, self.output, self.old_format, self.version)
+        start = 0
+        if checkpoint is not None:
+            os.truncate(self.output, checkpoint['output_size'])
+            start, self.gc_id = checkpoint['offset'], checkpoint['gc_id']
+        self.csv_file = open(self.output, 'w' if checkpoint is None else 'a', newline='')
+        self.writer = csv.writer(self.csv_file)
+        if checkpoint is None:
+            self.writer.writerow(CSV_COL)
+        self.parser = make_parser(self.version, self.old_format)
+        self.follower = LogFollower(self.filename, start=start)
+
+    def poll(self):
+        # parses what was appended since the last call, returns its size in bytes
+        block = self.follower.read()
+        if not block:
+            return 0
+        _, event_end, gc_id = scan_lines(block, self.writer, self.parser)
+        if event_end is not None:
+            self.gc_id = gc_id
+            self.csv_file.flush()
+        return len(block)
+
+    def checkpoint(self):
+        # only between two events, where a fresh parser can take over, and
+        # not while the follower still drains a log rotated away
+        self.checkpointed = time.monotonic()
+        try:
+            if self.parser.start_of_gc or os.stat(self.filename).st_ino != self.follower.inode:
+                return
+        except FileNotFoundError:
+            return
+        self.csv_file.flush()
+        save_checkpoint(self.filename, self.output, self.old_format, self.follower.position(), self.gc_id, self.version)
+
+    def close(self):
+        if self.follower is None:
+            return
+        self.checkpoint()
+        self.follower.close()
+        self.csv_file.close()
+
+async def ingest_log(log: IngestedLog, poll_interval: float = FOLLOW_POLL_INTERVAL):
+    import asyncio
+    try:
+        while True:
+            if log.follower is None:
+                # the format is sniffed once the JVM wrote something
+                if os.path.exists(log.filename) and os.path.getsize(log.filename) > 0:
+                    log.open()
+                else:
+                    await asyncio.sleep(poll_interval)
+                    continue
+            if log.poll():
+                # at most one block per turn, a long backlog does not starve the other logs
+                await asyncio.sleep(0)
+            else:
+                await asyncio.sleep(poll_interval)
+            if time.monotonic() - log.checkpointed >= INGEST_CHECKPOINT_INTERVAL:
+                log.checkpoint()
+    except Exception:
+        print('Failed to ingest {}'.format(log.filename))
+        traceback.print_exc()
+    finally:
+        log.close()
+
+async def ingest(directory, output_dir, pattern: str = INGEST_PATTERN, poll_interval: float = FOLLOW_POLL_INTERVAL,
+                 scan_interval: float = INGEST_SCAN_INTERVAL, version: int = None):
+    # one process and one event loop for every log under `directory`, e.g.
+    # `jvm-17/ucare.log` goes to `<output_dir>/jvm-17.ucare.log.csv`. logs that
+    # show up later are picked up at the next scan, a log that fails is
+    # reported and left alone
+    import asyncio
+    tasks = {}
+    try:
+        while True:
+            for filename in sorted(glob.glob(os.path.join(directory, pattern), recursive=True)):
+                if filename in tasks:
+                    continue
+                name = os.path.relpath(filename, directory).replace(os.sep, '.')
+                log = IngestedLog(filename, os.path.join(output_dir, '{}.csv'.format(name)), version)
+                tasks[filename] = asyncio.create_task(ingest_log(log, poll_interval))
+            await asyncio.sleep(scan_interval)
+    finally:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+def parse_entry(infile, outfile, old_format: bool = None, version: int = None, workers: int = 1, resume: bool = False,
+                output_format: str = 'csv', index: bool = False, bulk: bool = False, profile: bool = False,
+                pipeline: bool = False):
+    # runs inside the --jobs pool, a broken log must not take the others down
+    start_time = time.time()
+    try:
+        parse(infile, outfile, old_format, workers, resume, output_format, index, bulk, profile, pipeline, version)
+    except Exception:
+        return infile, outfile, time.time() - start_time, traceback.format_exc()
+    return infile, outfile, time.time() - start_time, None
+
+def parse_entries(entries, jobs: int, workers: int = 1, resume: bool = False, output_format: str = 'csv',
+                  index: bool = False, bulk: bool = False, profile: bool = False, pipeline: bool = False):
+    from tqdm import tqdm
+    failures = []
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        futures = [executor.submit(parse_entry, *entry, workers, resume, output_format, index, bulk, profile,
+                                   pipeline) for entry in entries]
+        pbar = tqdm(concurrent.futures.as_completed(futures), total=len(futures))
+        for future in pbar:
+            infile, outfile, elapsed, error = future.result()
+            if error is None:
+                pbar.set_description('Finished raw_data in={} out={} ({:.1f}s)'.format(infile, outfile, elapsed))
+            else:
+                pbar.set_description('Failed raw_data in={}'.format(infile))
+                failures.append((infile, error))
+    return failures
 
 def main(args):
+    from tqdm import tqdm
     print('Reading config')
     config = utilities.read_json_config(args.config, utilities.Task.parse)
     print('Starting parsing...')
@@ -448,18 +2033,75 @@ def main(args):
     print('Creating data directory {}'.format(output_dir))
     utilities.create_dir(output_dir)
     print('Reading raw data...')
-    threads = []
-    pbar = tqdm(range(len(config['data'])))
-    for index in pbar:
-        infile = config['data'][index]['file']
-        outfile = '{}/{}.csv'.format(output_dir, config['data'][index]['name'])
-        pbar.set_description('Processing raw_data in={} out={}'.format(infile, outfile))
-        parse(infile, outfile, config['data'][index]['old_format'] if 'old_format' in config['data'][index] else False)
+    extension = 'csv' if args.format == 'csv' or args.follow else 'columns'
+    entries = [(
+        data['file'],
+        '{}/{}.{}'.format(output_dir, data['name'], extension),
+        data['old_format'] if 'old_format' in data else None,
+        data.get('version', args.log_version),
+    ) for data in config['data']]
+
+    if args.follow:
+        follow_entries(entries, args.poll_interval)
+        return
+
+    if args.watch:
+        # the logs come from the watched directory instead of `data`
+        import asyncio
+        print('Ingesting {} under {}, press Ctrl+C to stop'.format(args.watch_pattern, args.watch))
+        try:
+            asyncio.run(ingest(args.watch, output_dir, args.watch_pattern, args.poll_interval, version=args.log_version))
+        except KeyboardInterrupt:
+            print('Stopped ingesting')
+        return
+
+    if args.gc_range or args.byte_range:
+        # e.g. data/benchmarks/dacapo.gc_100_200.csv next to data/benchmarks/dacapo.csv
+        selection = 'gc' if args.gc_range else 'bytes'
+        first, last = args.gc_range or args.byte_range
+        for infile, outfile, old_format, version in entries:
+            name, extension = os.path.splitext(outfile)
+            range_output = '{}.{}_{}_{}{}'.format(name, selection, first, last, extension)
+            events = parse_range(infile, outfile, range_output, args.gc_range, args.byte_range, old_format, args.format,
+                                 version)
+            print('Parsed {} GC events of {} into {}'.format(events, infile, range_output))
+        return
+
+    # a log with `rotated` set is parsed together with the logs it rolled over into
+    entries = [
+        (rotated_logs(infile) if data.get('rotated') else infile, outfile, old_format, version)
+        for data, (infile, outfile, old_format, version) in zip(config['data'], entries)
+    ]
+    failures = []
+    if args.jobs > 1:
+        failures = parse_entries(entries, args.jobs, args.workers, args.resume, args.format, args.index, args.bulk_convert,
+                                  args.profile, args.pipeline)
+        for infile, error in failures:
+            print('Failed to parse {}'.format(infile))
+            print(error)
+        print('Parsed {} of {} raw_data'.format(len(entries) - len(failures), len(entries)))
+    else:
+        pbar = tqdm(entries)
+        for infile, outfile, old_format, version in pbar:
+            pbar.set_description('Processing raw_data in={} out={}'.format(infile, outfile))
+            parse(infile, outfile, old_format, args.workers, args.resume, args.format, args.index, args.bulk_convert,
+                  args.profile, args.pipeline, version)
+
+    if args.store:
+        # the data directory itself becomes the store, next to the per-log outputs
+        failed = {infile for infile, _ in failures}
+        pbar = tqdm([(data, entry) for data, entry in zip(config['data'], entries) if entry[0] not in failed])
+        for data, (infile, outfile, _, _) in pbar:
+            pbar.set_description('Storing {}'.format(outfile))
+            partition = {'benchmark': data.get('benchmark', data['name']), 'heap': data.get('heap', 'unknown')}
+            utilities.store_log(output_dir, data['name'], outfile, partition, log_source(infile))
+    if failures:
+        sys.exit(1)
 
 if __name__ == '__main__':
-    import time
     start_time = time.time()
-    main(utilities.get_args())
+    main(utilities.get_args(parse=True))
     print("--- %s seconds ---" % (time.time() - start_time))
     # Threads: --- 71.97676062583923 seconds ---
     # No Thread : --- 64.11785078048706 seconds ---
+    # threads lose to the GIL, use --jobs to parse every log in its own process
@@ -1,14 +1,3 @@
-from datetime import datetime
-import subprocess
-
-import numpy as np
-import pandas as pd
-import seaborn as sbn
-
-from sklearn.model_selection import train_test_split
-
-from tqdm import tqdm
-
 import utilities
 from model import \
     prepare_trainer, \
@@ -19,10 +8,10 @@ from model import \
     save_plot
 
 def prepare_dataset(config, train_type, columns):
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
     print('Reading data')
-    raw_dataset = utilities.read_data([
-        '{}/{}'.format(config['dir']['data'], data) for data in config['data'][train_type]
-    ], columns)
+    raw_dataset = utilities.read_dataset(config['dir']['data'], config['data'][train_type], columns)
     dataset = pd.concat([dataset for dataset in raw_dataset])
 
     if train_type == 'main':
@@ -103,6 +92,7 @@ def get_data_col(train_type: utilities.TrainType):
         return get_prune_data_col()
 
 def main(args):
+    from tqdm import tqdm
     print('Reading config...')
     config = utilities.read_json_config(args.config, utilities.Task.train)
     train_type = str(args.type)
@@ -1,33 +1,32 @@
-from datetime import datetime
-import subprocess
-
-import numpy as np
-import pandas as pd
-import seaborn as sbn
-
-from sklearn.model_selection import train_test_split
-
-from tqdm import tqdm
+import os
+import glob
+import contextlib
+import json
+import hashlib
 
 import utilities
 from model import \
     prepare_trainer, \
+    prepare_streaming_trainer, \
     train_predictor, \
+    train_streaming_predictor, \
     test_predictor, \
+    test_streaming_predictor, \
     generate_diff, \
     save_diff, \
     save_plot
 
-def prepare_dataset(config, train_type, columns):
-    print('Reading data')
-    raw_dataset = utilities.read_data([
-        '{}/{}'.format(config['dir']['data'], data) for data in config['data'][train_type]
-    ], columns)
-    dataset = pd.concat([dataset for dataset in raw_dataset])
+TEST_SIZE = 0.25
+RANDOM_STATE = 42
+
+# bump whenever prepare_dataset changes what it returns for the same inputs
+DATASET_CACHE_VERSION = 1
 
+def row_window(config, train_type):
+    # rows of the concatenated logs a model is trained on, None for all of them
     if train_type == 'main':
         if 'specjvm' in config['name']:
-            dataset = dataset.iloc[1000:2000]
+            return (1000, 2000)
         elif 'renaissance' in config['name']:
             pass
             # dataset = dataset[dataset['gc_time_clean'] < 100]
@@ -35,7 +34,43 @@ def prepare_dataset(config, train_type, columns):
             # dataset = dataset.iloc[2000:]
             # [dataset['gc_time_clean'] < 1500]
         elif 'dacapo' in config['name']:
-            dataset = dataset.iloc[1000:2000]
+            return (1000, 2000)
+    return None
+
+def dataset_cache_key(config, train_type, columns):
+    # anything that changes the prepared dataset changes the key, input files
+    # are told apart by their path, size and modification time
+    key = {
+        'version': DATASET_CACHE_VERSION,
+        'inputs': [
+            (path, os.stat(path).st_size, os.stat(path).st_mtime_ns)
+            for path in utilities.dataset_inputs(config['dir']['data'], config['data'][train_type])
+        ],
+        'data': config['data'][train_type],
+        'columns': columns,
+        'train_type': train_type,
+        'window': row_window(config, train_type),
+        'split': {'test_size': TEST_SIZE, 'random_state': RANDOM_STATE},
+    }
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+def prepare_dataset(config, train_type, columns, cache_dir = None):
+    # with `cache_dir` a dataset prepared from the same inputs before is loaded instead
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    if cache_dir is not None:
+        cache_file = '{}/{}-{}.joblib'.format(cache_dir, train_type, dataset_cache_key(config, train_type, columns))
+        if os.path.isfile(cache_file):
+            print('Loading cached dataset {}'.format(cache_file))
+            return utilities.load(cache_file)
+
+    print('Reading data')
+    raw_dataset = utilities.read_dataset(config['dir']['data'], config['data'][train_type], columns)
+    dataset = pd.concat([dataset for dataset in raw_dataset])
+
+    window = row_window(config, train_type)
+    if window is not None:
+        dataset = dataset.iloc[window[0]:window[1]]
 
     print()
     print('Data summaries')
@@ -54,18 +89,18 @@ def prepare_dataset(config, train_type, columns):
     splitted_dataset = train_test_split(
         dataset.iloc[:, :-1],
         dataset.iloc[:, -1],
-        test_size=0.25, 
-        random_state=42)
+        test_size=TEST_SIZE,
+        random_state=RANDOM_STATE)
 
     print()
     print('Splitting cleaned dataset')
     splitted_cleaned_dataset = train_test_split(
         clean_dataset.iloc[:, :-1], 
         clean_dataset.iloc[:, -1],
-        test_size=0.25, 
-        random_state=42)
+        test_size=TEST_SIZE,
+        random_state=RANDOM_STATE)
 
-    return {
+    prepared = {
         'raw': raw_dataset,
         'dataset': dataset,
         'predict': pred_dataset,
@@ -73,6 +108,49 @@ def prepare_dataset(config, train_type, columns):
         'splitted_dataset': splitted_dataset,
         'splitted_cleaned_dataset': splitted_cleaned_dataset,
     }
+    if cache_dir is not None:
+        # one cached dataset per train type, the one of older inputs goes. a
+        # sweep running next to this one may have removed it already
+        for stale_file in glob.glob('{}/{}-*.joblib'.format(cache_dir, train_type)):
+            if stale_file != cache_file:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(stale_file)
+        # readers never see a half written dataset
+        tmp_file = '{}.{}.tmp'.format(cache_file, os.getpid())
+        utilities.save(tmp_file, prepared)
+        os.replace(tmp_file, cache_file)
+    return prepared
+
+def window_chunks(config, train_type, columns, chunk_size, window):
+    # the rows of `window` prepare_dataset trains on. a store yields its chunks
+    # partition by partition, not in log order, so the window is cut out of
+    # each log read whole, one log at a time, before it is chunked
+    offset = 0
+    for entry in config['data'][train_type]:
+        if offset >= window[1]:
+            break
+        data = utilities.read_dataset(config['dir']['data'], [entry], columns)[0]
+        start = offset
+        offset += len(data)
+        data = data.iloc[max(window[0] - start, 0):max(window[1] - start, 0)]
+        for chunk_start in range(0, len(data), chunk_size):
+            yield data.iloc[chunk_start:chunk_start + chunk_size]
+
+def stream_dataset(config, train_type, columns, chunk_size, test = False):
+    # (X, y) of the training rows, or with `test` of the test rows, `chunk_size` rows
+    # at a time. the split draws the same rows on every pass, TEST_SIZE of them go to test
+    import numpy as np
+    rng = np.random.default_rng(RANDOM_STATE)
+    window = row_window(config, train_type)
+    if window is None:
+        chunks = utilities.read_dataset_chunks(config['dir']['data'], config['data'][train_type], columns, chunk_size)
+    else:
+        chunks = window_chunks(config, train_type, columns, chunk_size, window)
+    for chunk in chunks:
+        is_test = rng.random(len(chunk)) < TEST_SIZE
+        chunk = chunk[is_test if test else ~is_test]
+        if len(chunk):
+            yield chunk.iloc[:, :-1], chunk.iloc[:, -1]
 
 def get_data_col(train_type: utilities.TrainType):
     def get_main_data_col():
@@ -125,17 +203,42 @@ def get_data_col(train_type: utilities.TrainType):
         return get_otyrt_data_col()
 
 def main(args):
+    from tqdm import tqdm
     print('Reading config...')
     config = utilities.read_json_config(args.config, utilities.Task.train)
     train_type = str(args.type)
     print('Preparing output directory...')
     output_dir = '{}/{}/train/{}'.format(config['dir']['output'], config['name'], train_type)
     utilities.create_dir(output_dir)
-    print('Preparing dataset...')
-    dataset = prepare_dataset(config, train_type, get_data_col(args.type))
+    model_dir = '{}/model'.format(output_dir)
     print('Preparing trainers...')
     trainers = prepare_trainer(config)
-    print('There are {} models that needs to be trained'.format(len(trainers)))
+    streaming_trainers = prepare_streaming_trainer(config)
+    print('There are {} models that needs to be trained'.format(len(trainers) + len(streaming_trainers)))
+
+    if streaming_trainers:
+        # the dataset is read again on every pass and never held in memory as a whole
+        print()
+        print('Training predictors on chunks of {} rows...'.format(args.chunk_size))
+        columns = get_data_col(args.type)
+        train_chunks = lambda: stream_dataset(config, train_type, columns, args.chunk_size)
+        test_chunks = lambda: stream_dataset(config, train_type, columns, args.chunk_size, test=True)
+        streaming_predictors = train_streaming_predictor(config, streaming_trainers, train_chunks)
+        print(streaming_predictors)
+        print()
+        print('Test predictors...')
+        test_streaming_predictor(streaming_predictors, test_chunks)
+        utilities.create_dir(model_dir)
+        for predictor in streaming_predictors:
+            utilities.save('{}/{}.joblib'.format(model_dir, predictor), streaming_predictors[predictor])
+        if not trainers:
+            return
+
+    print('Preparing dataset...')
+    cache_dir = '{}/{}/train/cache'.format(config['dir']['output'], config['name'])
+    if args.cache:
+        utilities.create_dir(cache_dir)
+    dataset = prepare_dataset(config, train_type, get_data_col(args.type), cache_dir if args.cache else None)
     print()
     print('Training predictors...')
     predictors = train_predictor(config, trainers, dataset)
@@ -148,7 +251,6 @@ def main(args):
     cdf_dir = '{}/cdf'.format(output_dir)
     gnuplot_dir = '{}/gnuplot'.format(output_dir)
     plot_dir = '{}/plot'.format(output_dir)
-    model_dir = '{}/model'.format(output_dir)
     
     utilities.create_dir(cdf_dir)
     utilities.create_dir(gnuplot_dir)
@@ -1,14 +1,21 @@
+from __future__ import annotations
+
 import os
+import shutil
+import itertools
+import contextlib
+import concurrent.futures
 import argparse
 import json
-import pandas as pd
-
-import joblib
-import jsonschema
-from tqdm import tqdm
+from typing import TYPE_CHECKING
 
 from enum import Enum
 
+# numpy, pandas, joblib, jsonschema and tqdm are imported by the functions
+# that use them, so `--help` and the scripts importing this module start fast
+if TYPE_CHECKING:
+    import pandas as pd
+
 class Task(Enum):
     train = 'train'
     parse = 'parse'
@@ -26,6 +33,18 @@ class TrainType(Enum):
     def __str__(self):
         return self.value    
 
+# the keys a store selector may filter on, besides the partition keys
+selector_schema = {
+    'name': {'type': 'string'},
+    'benchmark': {'type': 'string'},
+    'heap': {'type': 'string'},
+    'workers': {'type': 'integer'},
+    'range': {
+        'type': 'object',
+        'additionalProperties': {'type': 'array', 'items': {'type': 'number'}, 'minItems': 2, 'maxItems': 2},
+    },
+}
+
 def generate_schema(task: Task):
     def generate_parse_schema():
         parse_data_schema = {
@@ -36,6 +55,13 @@ def generate_schema(task: Task):
                     'name': {'type' : 'string'},
                     'file': {'type' : 'string'},
                     'old_format': {'type': 'boolean'},
+                    # the parse_vN format of the log, sniffed from its head when left out
+                    'version': {'type': 'integer', 'enum': [1, 2, 3]},
+                    # also parse `file.0 ... file.N`, see parse_v3.rotated_logs
+                    'rotated': {'type': 'boolean'},
+                    # partition of the log in a store, see store_log
+                    'benchmark': {'type': 'string'},
+                    'heap': {'type': 'string'},
                 },
                 'required': ['name', 'file'],
             },
@@ -59,7 +85,11 @@ def generate_schema(task: Task):
         data_schema = {
             'type': 'array',
             'items': {
-                'type': 'string',
+                # a log name, or a selector of store partitions
+                'anyOf': [
+                    {'type': 'string'},
+                    {'type': 'object', 'properties': selector_schema},
+                ],
             },
             'minItems': 1,
         }
@@ -83,10 +113,11 @@ def generate_schema(task: Task):
                     'type': 'array',
                     'items': {
                         'type': 'string',
-                        'enum': ['ransac', 'lreg', 'svr']
+                        # sgd and streaming_ols are fit on chunks of the data, see model.prepare_streaming_trainer
+                        'enum': ['ransac', 'lreg', 'svr', 'sgd', 'streaming_ols']
                     },
                     'minItems': 1,
-                    'maxItems': 3,
+                    'maxItems': 5,
                     'additionalItems': False,
                 },
                 'data': {
@@ -108,7 +139,7 @@ def generate_schema(task: Task):
             'items': {
                 'type': 'object',
                 'properties': {
-                    'name': {'type' : 'string'},
+                    **selector_schema,
                     # 'file': {'type' : 'string'},
                     'color': {'type' : 'string'},
                     'label': {'type' : 'string'},
@@ -171,37 +202,457 @@ def generate_schema(task: Task):
         return generate_inference_schema()
 
 def read_json_config(path: str, task: Task = Task.parse):
+    import jsonschema
     with open(path) as f:
         config = json.load(f)
         jsonschema.validate(config, generate_schema(task))
         return config    
 
-def get_args(train: bool = False):
+def get_args(train: bool = False, parse: bool = False):
     parser = argparse.ArgumentParser()
     parser.add_argument('-c', '--config', help='Config file', required=True)
     if train:
         parser.add_argument('-t', '--type', type=TrainType, help='Config file', required=True, choices=list(TrainType))
+        parser.add_argument('--no-cache', dest='cache', action='store_false', help='Prepare the dataset again instead of loading it from the cache')
+        parser.add_argument('--chunk-size', type=int, default=1000000, help='Rows read at a time for the sgd and streaming_ols models')
+    if parse:
+        parser.add_argument('-w', '--workers', type=int, default=1, help='Number of processes used to parse a single log')
+        parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of logs parsed concurrently, each in its own process')
+        parser.add_argument('--format', choices=['csv', 'columnar'], default='csv', help='csv file or a directory with one .npy file per column')
+        parser.add_argument('--no-resume', dest='resume', action='store_false', help='Ignore checkpoints and parse every log from the beginning')
+        parser.add_argument('-f', '--follow', action='store_true', help='Keep tailing the logs and append GC events as they finish')
+        parser.add_argument('--log-version', type=int, choices=[1, 2, 3], help='Format version of the logs without a `version` key, instead of telling it from their first 256 KiB')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to wait for new log lines in follow and watch mode')
+        parser.add_argument('--watch', metavar='DIR', help='Keep ingesting every log under DIR, each JVM into its own csv, in a single process')
+        parser.add_argument('--watch-pattern', default='**/ucare.log', help='Glob of the logs picked up under the --watch directory')
+        parser.add_argument('--bulk-convert', action='store_true', help='Convert the values of a batch of GC events at once with numpy')
+        parser.add_argument('--store', action='store_true', help='Also file every parsed log into the partitioned store in the data directory')
+        parser.add_argument('--index', action='store_true', help='Also write <output>.idx with the byte range of every GC event')
+        parser.add_argument('--pipeline', action='store_true', help='Read, parse and write each log in separate threads connected by bounded queues')
+        parser.add_argument('--profile', action='store_true', help='Also write <output>.profile.json with lines, helper time and events per line kind')
+        ranges = parser.add_mutually_exclusive_group()
+        ranges.add_argument('--gc-range', type=int, nargs=2, metavar=('FIRST', 'LAST'), help='Only re-parse GC events FIRST..LAST through the index')
+        ranges.add_argument('--byte-range', type=int, nargs=2, metavar=('START', 'END'), help='Only re-parse GC events starting in [START, END) through the index')
     args = parser.parse_args()
     return args
 
 # def is_main_train(train_type: TrainType = TrainType.main):
     # return train_type == TrainType.main
 
-def read_data(csv_files, data_col, prefix = ''):
+def read_columnar(path: str, data_col, rows: slice = slice(None)):
+    # only the requested columns are touched, each .npy is memory mapped
+    # and only `rows` of it are read
+    import numpy as np
+    import pandas as pd
+    with open(os.path.join(path, 'manifest.json')) as f:
+        manifest = json.load(f)
+    data = {}
+    for column in data_col:
+        column_info = manifest['columns'][column]
+        values = np.load(os.path.join(path, column_info['file']), mmap_mode='r' if manifest['rows'] > 0 else None)[rows]
+        if 'categories' in column_info:
+            values = pd.Categorical.from_codes(values, column_info['categories'])
+        data[column] = values
+    return pd.DataFrame(data, columns=data_col)
+
+# numpy types of the array typecodes the columnar format stores
+TYPECODE_DTYPES = {'q': 'int64', 'i': 'int32', 'd': 'float64'}
+
+def csv_dtypes(data_col):
+    # the types `--format columnar` stores the columns as, so a csv reads into
+    # the same frame as the columnar output of the same log. measured values
+    # stay float64, float32 would already round the millisecond timings
+    from parse_v3 import COLUMN_TYPES  # parse_v3 imports this module
+    dtypes = {column: TYPECODE_DTYPES[COLUMN_TYPES.get(column, 'd')] for column in data_col}
+    if 'phases' in dtypes:
+        dtypes['phases'] = 'category'
+    return dtypes
+
+# rows csv_read_dtypes looks at to tell the integer columns of a csv
+DTYPE_CHECK_ROWS = 1000
+
+def csv_read_dtypes(csvfile: str, data_col):
+    # csv_dtypes of a csv file. older parsers wrote some of the integer
+    # columns as floats, those read as float64. decided once from the first
+    # rows, so every chunk of a file comes out with the same types
+    import pandas as pd
+    dtypes = csv_dtypes(data_col)
+    integers = [column for column, dtype in dtypes.items() if dtype.startswith('int')]
+    if integers:
+        head = pd.read_csv(csvfile, usecols=integers, nrows=DTYPE_CHECK_ROWS)
+        for column in integers:
+            if len(head) and not pd.api.types.is_integer_dtype(head[column]):
+                dtypes[column] = 'float64'
+    return dtypes
+
+def read_csv(csvfile: str, data_col, float_precision: str = None):
+    # only the columns in `data_col` are parsed
+    import pandas as pd
+    return pd.read_csv(csvfile, usecols=data_col, dtype=csv_read_dtypes(csvfile, data_col),
+                       float_precision=float_precision)[data_col]
+
+def read_csv_chunks(csvfile: str, data_col, chunk_size: int):
+    # read_csv, `chunk_size` rows at a time
+    import pandas as pd
+    for chunk in pd.read_csv(csvfile, usecols=data_col, dtype=csv_read_dtypes(csvfile, data_col), chunksize=chunk_size):
+        yield chunk[data_col]
+
+def read_columnar_chunks(path: str, data_col, chunk_size: int):
+    with open(os.path.join(path, 'manifest.json')) as f:
+        rows = json.load(f)['rows']
+    for start in range(0, rows, chunk_size):
+        yield read_columnar(path, data_col, slice(start, start + chunk_size))
+
+def log_output(name: str):
+    # the output parse_v3.py wrote last for `name`: `<name>.columns` written by
+    # `--format columnar` or `<name>.csv`, the newer one when both are there
+    columnar = '{}.columns'.format(name)
+    csv_file = '{}.csv'.format(name)
+    if not os.path.isdir(columnar):
+        return csv_file
+    if os.path.isfile(csv_file) and output_stat(csv_file)['mtime_ns'] > output_stat(columnar)['mtime_ns']:
+        return csv_file
+    return columnar
+
+def output_stat(path: str):
+    # size and modification time of an output, a columnar one changes along with its manifest
+    stat = os.stat(os.path.join(path, 'manifest.json') if os.path.isdir(path) else path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+# fewer csv files are read serially, starting the pool costs about as much
+# as reading one file (see benchmarks.read_data)
+POOL_MIN_FILES = 4
+
+def read_data(csv_files, data_col, prefix = '', workers: int = 1):
+    # one output per name, see log_output. with `workers` and enough csv files
+    # up to that many of them are parsed at the same time, each in its own process
+    from tqdm import tqdm
+    paths = [log_output('{}{}'.format(prefix, csv_file)) for csv_file in csv_files]
+    csv_paths = [path for path in paths if not os.path.isdir(path)]
+    workers = min(workers or 1, len(csv_paths), os.cpu_count() or 1) if len(csv_paths) >= POOL_MIN_FILES else 1
+    with concurrent.futures.ProcessPoolExecutor(workers) if workers > 1 else contextlib.nullcontext() as executor:
+        csv_datasets = (executor.map if workers > 1 else map)(read_csv, csv_paths, itertools.repeat(data_col))
+        datasets = []
+        pbar = tqdm(paths)
+        for path in pbar:
+            if os.path.isdir(path):
+                pbar.set_description('Reading columnar data {}'.format(path))
+                datasets.append(read_columnar(path, data_col))
+            else:
+                pbar.set_description('Reading csv file {}'.format(path))
+                datasets.append(next(csv_datasets))
+    return datasets
+
+STORE_MANIFEST = 'store.json'
+PARTITION_KEYS = ['benchmark', 'heap', 'workers']
+
+def is_store(path: str):
+    return os.path.isfile(os.path.join(path, STORE_MANIFEST))
+
+def read_store_manifest(store: str):
+    try:
+        with open(os.path.join(store, STORE_MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'partition_keys': PARTITION_KEYS, 'partitions': {}}
+
+def write_store_manifest(store: str, manifest):
+    # readers never see a half written manifest
+    path = os.path.join(store, STORE_MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def partition_path(partition):
+    return os.path.join(*['{}={}'.format(key, partition[key]) for key in PARTITION_KEYS])
+
+def write_columns(path: str, dataframe: pd.DataFrame):
+    # same layout as `parse_v3.py --format columnar`, so read_columnar reads it
+    import numpy as np
+    import pandas as pd
+    os.makedirs(path, exist_ok=True)
+    columns = {}
+    for column in dataframe.columns:
+        values = dataframe[column]
+        column_info = {'file': '{}.npy'.format(column)}
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            column_info['categories'] = list(values.cat.categories)
+            values = values.cat.codes.astype(np.int32)
+        np.save(os.path.join(path, column_info['file']), values.to_numpy())
+        columns[column] = column_info
+    with open(os.path.join(path, 'manifest.json'), 'w') as f:
+        json.dump({'rows': len(dataframe), 'columns': columns}, f, indent=2)
+
+def column_bounds(dataframe: pd.DataFrame):
+    import pandas as pd
+    numeric = dataframe.select_dtypes('number')
+    bounds = numeric.min(), numeric.max()
+    return [{column: None if pd.isna(value) else float(value) for column, value in bound.items()} for bound in bounds]
+
+def merge_bounds(partition):
+    # a partition spans the union of its files
+    files = partition['files'].values()
+    partition['rows'] = sum(info['rows'] for info in files)
+    partition['min'], partition['max'] = {}, {}
+    for info in files:
+        for column, value in info['min'].items():
+            if value is not None:
+                partition['min'][column] = min(partition['min'].get(column, value), value)
+        for column, value in info['max'].items():
+            if value is not None:
+                partition['max'][column] = max(partition['max'].get(column, value), value)
+
+def store_log(store: str, name: str, output: str, partition, source):
+    # files the parsed `output` of log `name` into `store`, its events split
+    # by GC worker count under `benchmark=../heap=../workers=../<name>.columns`.
+    # `row` keeps the position of every event in the log
+    import numpy as np
+    import pandas as pd
+    if os.path.isdir(output):
+        with open(os.path.join(output, 'manifest.json')) as f:
+            data = read_columnar(output, list(json.load(f)['columns']))
+    else:
+        # typed like the columnar output, so the partitions of a log agree
+        # on their dtypes whichever format it was parsed to. round_trip reads
+        # the floats back exactly as the columnar format holds them
+        data = read_csv(output, list(pd.read_csv(output, nrows=0).columns), float_precision='round_trip')
+    data = data.copy()
+    data['row'] = np.arange(len(data))
+
+    manifest = read_store_manifest(store)
+    # whatever an earlier run stored for this log is replaced
+    for key, stored in list(manifest['partitions'].items()):
+        info = stored['files'].pop(name, None)
+        if info is None:
+            continue
+        shutil.rmtree(os.path.join(store, info['path']), ignore_errors=True)
+        if stored['files']:
+            merge_bounds(stored)
+        else:
+            del manifest['partitions'][key]
+
+    for workers, rows in data.groupby('parallel_workers', sort=True):
+        rows_partition = dict(partition, workers=int(workers))
+        key = partition_path(rows_partition)
+        path = os.path.join(key, '{}.columns'.format(name))
+        write_columns(os.path.join(store, path), rows)
+        low, high = column_bounds(rows.drop(columns='row'))
+        stored = manifest['partitions'].setdefault(key, dict(rows_partition, files={}))
+        stored['files'][name] = {'path': path, 'rows': len(rows), 'min': low, 'max': high, 'source': source,
+                                 'output': output_stat(output)}
+        merge_bounds(stored)
+    write_store_manifest(store, manifest)
+
+def within_bounds(info, ranges):
+    for column, (low, high) in ranges.items():
+        if column not in info['min'] or info['max'][column] < low or info['min'][column] > high:
+            return False
+    return True
+
+def select_files(manifest, selector):
+    # pruning only looks at the manifest, no partition directory is listed
+    ranges = selector.get('range', {})
+    for partition in manifest['partitions'].values():
+        if any(str(partition[key]) != str(selector[key]) for key in PARTITION_KEYS if key in selector):
+            continue
+        if not within_bounds(partition, ranges):
+            continue
+        for name, info in partition['files'].items():
+            if ('name' not in selector or name == selector['name']) and within_bounds(info, ranges):
+                yield name, info
+
+def read_store(store: str, selectors, data_col):
+    # one dataframe per selector: a log name, or a dict of partition keys,
+    # `name` and `range` ({column: [min, max]}) as in the train and inference configs
+    import pandas as pd
+    from tqdm import tqdm
+    manifest = read_store_manifest(store)
     datasets = []
-    pbar = tqdm(csv_files)
-    for csv_file in pbar:
-        csvfile = '{}{}.csv'.format(prefix, csv_file)
-        pbar.set_description('Reading csv file {}'.format(csvfile))
-        dataset = pd.read_csv(csvfile)[data_col]
-        datasets.append(dataset)
+    pbar = tqdm(selectors)
+    for selector in pbar:
+        if isinstance(selector, str):
+            selector = {'name': selector}
+        ranges = selector.get('range', {})
+        columns = list(dict.fromkeys(data_col + list(ranges) + ['row']))
+        logs = {}
+        for name, info in select_files(manifest, selector):
+            pbar.set_description('Reading store partition {}'.format(info['path']))
+            data = read_columnar(os.path.join(store, info['path']), columns)
+            for column, (low, high) in ranges.items():
+                data = data[(data[column] >= low) & (data[column] <= high)]
+            logs.setdefault(name, []).append(data)
+        if not logs:
+            raise FileNotFoundError('no partition of {} matches {}'.format(store, selector))
+        # the events of a log come back in log order, whatever partitions they sit in
+        dataset = pd.concat([
+            pd.concat(frames).sort_values('row', kind='stable') for frames in logs.values()
+        ], ignore_index=True)
+        datasets.append(dataset[data_col])
     return datasets
 
+def source_changed(source):
+    # whether the log a store partition was filled from has another size now,
+    # a log that is gone can not tell
+    logs = source['log'] if isinstance(source['log'], list) else [source['log']]
+    if not all(os.path.isfile(log) for log in logs):
+        return False
+    return sum(os.path.getsize(log) for log in logs) != source['size']
+
+def unstored_output(data_dir: str, manifest, entry):
+    # the output in `data_dir` to read a log `entry` from instead of the store:
+    # the log was never stored, or its output or log changed after it was.
+    # None for selectors of partition keys, they only ever read the store
+    selector = {'name': entry} if isinstance(entry, str) else entry
+    if 'name' not in selector or any(key in selector for key in PARTITION_KEYS):
+        return None
+    output = log_output('{}/{}'.format(data_dir, selector['name']))
+    if not os.path.exists(output):
+        return None
+    stored = [
+        info for partition in manifest['partitions'].values()
+        for name, info in partition['files'].items() if name == selector['name']
+    ]
+    if not stored:
+        return output
+    for info in stored:
+        if ('output' in info and info['output'] != output_stat(output)) or source_changed(info['source']):
+            return output
+    return None
+
+def read_outputs(outputs, entries, data_col):
+    # read_data of the outputs unstored_output picked, with the `range` of each entry applied
+    ranges = [{} if isinstance(entry, str) else entry.get('range', {}) for entry in entries]
+    columns = list(dict.fromkeys(data_col + [column for entry_ranges in ranges for column in entry_ranges]))
+    datasets = []
+    for data, entry_ranges in zip(read_data([os.path.splitext(output)[0] for output in outputs], columns), ranges):
+        for column, (low, high) in entry_ranges.items():
+            data = data[(data[column] >= low) & (data[column] <= high)]
+        datasets.append(data[data_col].reset_index(drop=True))
+    return datasets
+
+def read_dataset(data_dir: str, entries, data_col):
+    # `data_dir` holds one output per log, or is a store written by `parse_v3.py --store`.
+    # logs a store does not hold or holds an older parse of are read from their own output
+    if not is_store(data_dir):
+        return read_data([
+            '{}/{}'.format(data_dir, entry if isinstance(entry, str) else entry['name']) for entry in entries
+        ], data_col)
+    manifest = read_store_manifest(data_dir)
+    outputs = [unstored_output(data_dir, manifest, entry) for entry in entries]
+    stored = iter(read_store(data_dir, [entry for entry, output in zip(entries, outputs) if output is None], data_col))
+    unstored = iter(read_outputs(
+        [output for output in outputs if output is not None],
+        [entry for entry, output in zip(entries, outputs) if output is not None], data_col))
+    return [next(stored) if output is None else next(unstored) for output in outputs]
+
+def read_dataset_chunks(data_dir: str, entries, data_col, chunk_size: int):
+    # the rows read_dataset returns, as frames of at most `chunk_size` rows so
+    # that no more than one of them is in memory. the rows of a store come
+    # partition by partition, not in log order
+    if is_store(data_dir):
+        manifest = read_store_manifest(data_dir)
+        for selector in entries:
+            if isinstance(selector, str):
+                selector = {'name': selector}
+            ranges = selector.get('range', {})
+            columns = list(dict.fromkeys(data_col + list(ranges)))
+            output = unstored_output(data_dir, manifest, selector)
+            if output is not None:
+                chunks = (read_columnar_chunks(output, columns, chunk_size) if os.path.isdir(output)
+                          else read_csv_chunks(output, columns, chunk_size))
+                for data in chunks:
+                    for column, (low, high) in ranges.items():
+                        data = data[(data[column] >= low) & (data[column] <= high)]
+                    yield data[data_col]
+                continue
+            files = list(select_files(manifest, selector))
+            if not files:
+                raise FileNotFoundError('no partition of {} matches {}'.format(data_dir, selector))
+            for _, info in files:
+                for data in read_columnar_chunks(os.path.join(data_dir, info['path']), columns, chunk_size):
+                    for column, (low, high) in ranges.items():
+                        data = data[(data[column] >= low) & (data[column] <= high)]
+                    yield data[data_col]
+        return
+    for entry in entries:
+        output = log_output('{}/{}'.format(data_dir, entry if isinstance(entry, str) else entry['name']))
+        if os.path.isdir(output):
+            yield from read_columnar_chunks(output, data_col, chunk_size)
+        else:
+            yield from read_csv_chunks(output, data_col, chunk_size)
+
+def dataset_inputs(data_dir: str, entries):
+    # the files read_dataset reads for `entries`, a store only changes along
+    # with its manifest and the outputs read instead of it
+    if is_store(data_dir):
+        manifest = read_store_manifest(data_dir)
+        inputs = [os.path.join(data_dir, STORE_MANIFEST)]
+        outputs = [unstored_output(data_dir, manifest, entry) for entry in entries]
+    else:
+        inputs = []
+        outputs = [log_output('{}/{}'.format(data_dir, entry if isinstance(entry, str) else entry['name']))
+                   for entry in entries]
+    return inputs + [
+        os.path.join(output, 'manifest.json') if os.path.isdir(output) else output
+        for output in outputs if output is not None
+    ]
+
+# keys of the values that are no number, quantised finite values stay below 2 ** 62
+INF_KEY = 2 ** 62
+NAN_KEY = 3 * 2 ** 61
+
+def column_keys(column: pd.Series, n_round: int = 2):
+    # one int64 per value, equal for the values that round to the same value
+    # at `n_round` decimals, None when a value is too large to quantise
+    import numpy as np
+    import pandas as pd
+    if pd.api.types.is_float_dtype(column.dtype):
+        # what DataFrame.round does before scaling back
+        quantised = column.to_numpy() * 10.0 ** n_round
+        np.rint(quantised, out=quantised)
+        if np.isfinite(quantised[np.abs(quantised) >= INF_KEY]).any():
+            return None
+        np.clip(quantised, -INF_KEY, INF_KEY, out=quantised)
+        quantised[np.isnan(quantised)] = NAN_KEY
+        return quantised.astype(np.int64)
+    if pd.api.types.is_integer_dtype(column.dtype) or pd.api.types.is_bool_dtype(column.dtype):
+        return column.to_numpy().astype(np.int64)
+    return pd.factorize(column)[0].astype(np.int64)
+
+def clean_mask(dataframe: pd.DataFrame, n_round: int = 2):
+    # True for the first of the rows that are equal once rounded to `n_round`
+    # decimals. rows are told apart by a 64 bit hash of their column keys,
+    # rows that only share the hash are caught by comparing the keys after
+    import numpy as np
+    import pandas as pd
+    hashes = np.zeros(len(dataframe), dtype=np.uint64)
+    for _, column in dataframe.items():
+        keys = column_keys(column, n_round)
+        if keys is None:
+            return ~dataframe.round(n_round).duplicated().to_numpy()
+        # splitmix64 finaliser of the key, folded into the row hash
+        keys = keys.view(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        keys ^= keys >> np.uint64(31)
+        hashes ^= keys
+        hashes *= np.uint64(0xBF58476D1CE4E5B9)
+        hashes ^= hashes >> np.uint64(29)
+    codes, uniques = pd.factorize(hashes)
+    # the first row of every hash, assigned backwards so it is the one left
+    first = np.empty(len(uniques), dtype=np.int64)
+    first[codes[::-1]] = np.arange(len(dataframe) - 1, -1, -1)
+    mask = np.zeros(len(dataframe), dtype=bool)
+    mask[first] = True
+    duplicates = np.flatnonzero(~mask)
+    originals = first[codes[duplicates]]
+    for _, column in dataframe.items():
+        keys = column_keys(column, n_round)
+        if (keys[duplicates] != keys[originals]).any():
+            return ~dataframe.round(n_round).duplicated().to_numpy()
+    return mask
+
 def clean_data(dataframe: pd.DataFrame, n_round: int = 2):
-    df = dataframe.copy(deep=True)
-    df = df.round(n_round)
-    df = df.drop_duplicates()
-    return df
+    # only the rows that are kept get rounded
+    return dataframe[clean_mask(dataframe, n_round)].round(n_round)
 
 def format_date(date):
     return '{}-{}-{}T{}:{}:{}'.format(date.day, date.month, date.year, date.hour, date.minute, date.second)
@@ -217,7 +668,9 @@ def create_dir(path: str):
         return True
 
 def save(filename: str, payload):
+    import joblib
     joblib.dump(payload, filename)
 
 def load(filename: str):
+    import joblib
     return joblib.load(filename)